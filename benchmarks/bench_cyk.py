@@ -0,0 +1,61 @@
+import random
+import sys
+import time
+
+from chomchom import ContextFreeGrammar
+from chomchom.cyk import CYKRecognizer, import_numpy
+
+from bench_ll1 import expression
+
+AMBIGUOUS = '''
+    E -> E + E | E * E | ( E ) | id
+'''
+
+
+def ladder(levels=12):
+    # A precedence ladder alternating + and *, with parentheses at the
+    # bottom: the same sentences, with a much larger normal form.
+    lines = []
+    for i in range(levels):
+        op = '+*'[i % 2]
+        lines.append(f'E{i} -> E{i} {op} E{i + 1} | E{i + 1}')
+    lines.append(f'E{levels} -> ( E0 ) | id')
+    return '\n'.join(lines)
+
+
+def sentences(n, shortest=50, longest=200, seed=0):
+    rng = random.Random(seed)
+    result = []
+    while len(result) < n:
+        sentence = expression(rng)
+        while len(sentence) < shortest:
+            sentence += [rng.choice('+*'), *expression(rng)]
+        if len(sentence) <= longest:
+            result.append(sentence)
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    stream = sentences(n)
+    tokens = sum(map(len, stream))
+
+    print(f'sentences: {n}')
+    print(f'tokens:    {tokens}')
+
+    for name, grammar in (('ambiguous', AMBIGUOUS), ('ladder', ladder())):
+        g = ContextFreeGrammar.from_string(grammar)
+        for use_numpy in (False, True):
+            if use_numpy and not import_numpy():
+                print(f'{name}, numpy: not installed')
+                continue
+            cyk = CYKRecognizer(g, use_numpy=use_numpy)
+            start = time.perf_counter()
+            assert all(cyk.recognize(sentence) for sentence in stream)
+            elapsed = time.perf_counter() - start
+            label = f'{name}, {"numpy" if use_numpy else "ints"}:'
+            print(f'{label:18} {tokens / elapsed:,.0f} tokens/sec')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+import statistics
+import subprocess
+import sys
+
+
+def import_times(module):
+    # Cumulative import time of `module` and of each module it imports,
+    # in microseconds, from a fresh interpreter.
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True,
+    ).stderr
+
+    times = {}
+    for line in output.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3:
+            try:
+                times[fields[2].strip()] = int(fields[1])
+            except ValueError:
+                pass
+    return times
+
+
+def main():
+    module = sys.argv[1] if len(sys.argv) > 1 else 'chomchom'
+    runs = [import_times(module) for _ in range(10)]
+
+    total = statistics.median(run[module] for run in runs)
+    slowest = sorted(runs[-1].items(), key=lambda item: -item[1])[1:8]
+
+    print(f'import {module}: {total / 1000:.1f} ms (median of {len(runs)})')
+    for name, us in slowest:
+        print(f'  {name:<30} {us / 1000:6.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import sys
+import time
+
+from chomchom import ContextFreeGrammar
+
+
+def statements(n):
+    # A keyword-heavy language: `n` kinds of statement, a few of which
+    # nest other statements, over a small expression grammar.
+    lines = [
+        'P -> P Q | Q',
+        'Q -> ' + ' | '.join(f'S{i}' for i in range(n)) + ' | { P }',
+    ]
+    for i in range(n):
+        if i % 20 == 0:
+            lines.append(f'S{i} -> k{i} E ; | k{i} ( E ) Q | k{i} id = E ;')
+        else:
+            lines.append(f'S{i} -> k{i} E ; | k{i} [ L ] ; | k{i} id = E ;')
+    lines += [
+        'L -> L , E | E',
+        'E -> E + T | E - T | T',
+        'T -> T * F | F',
+        'F -> ( E ) | id | num | F [ E ]',
+    ]
+    return ContextFreeGrammar.from_lines(lines)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    grammar = statements(n)
+
+    start = time.perf_counter()
+    table = grammar.build_lalr_table()
+    elapsed = time.perf_counter() - start
+
+    print(f'productions: {len(grammar.production_rules.rhs)}')
+    print(f'states:      {len(table)}')
+    print(f'conflicts:   {len(table.conflicts)}')
+    print(f'build time:  {elapsed:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import random
+import sys
+import time
+
+from chomchom import ContextFreeGrammar
+
+GRAMMAR = '''
+    E  -> T E1
+    E1 -> + T E1 | &
+    T  -> F T1
+    T1 -> * F T1 | &
+    F  -> ( E ) | id
+'''
+
+
+def expression(rng, depth=0):
+    if depth > 4 or rng.random() < 0.3:
+        return ['id']
+    if rng.random() < 0.2:
+        return ['(', *expression(rng, depth + 1), ')']
+    return [*expression(rng, depth + 1), rng.choice('+*'),
+            *expression(rng, depth + 1)]
+
+
+def sentences(n, seed=0):
+    rng = random.Random(seed)
+    return [expression(rng) for _ in range(n)]
+
+
+def tokens_per_second(parse, sentences, repeat=5):
+    tokens = sum(len(sentence) for sentence in sentences)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for sentence in sentences:
+            parse(sentence)
+        best = min(best, time.perf_counter() - start)
+    return tokens / best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    table = ContextFreeGrammar.from_string(GRAMMAR).build_ll1_table()
+    stream = sentences(n)
+
+    assert all(table.recognize(sentence) for sentence in stream)
+
+    print(f'sentences:             {n}')
+    print(f'tokens:                {sum(map(len, stream))}')
+    print(f'recognize, tokens/sec: '
+          f'{tokens_per_second(table.recognize, stream):,.0f}')
+    print(f'parse, tokens/sec:     '
+          f'{tokens_per_second(table.parse, stream):,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import random
+import sys
+import time
+import tracemalloc
+
+from chomchom.symbol import symbol_from_string
+
+
+def tokens(n, vocabulary=2000, seed=0):
+    rng = random.Random(seed)
+    words = (
+        [f'A{i}' for i in range(vocabulary // 2)] +
+        [f'x{i}' for i in range(vocabulary // 2)] +
+        ['&', '+', '*', '(', ')', 'id']
+    )
+    return [rng.choice(words) for _ in range(n)]
+
+
+def symbols_per_second(stream, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for token in stream:
+            symbol_from_string(token)
+        best = min(best, time.perf_counter() - start)
+    return len(stream) / best
+
+
+def bytes_per_token(stream):
+    # What a stream of tokens costs in symbols, on average: with interning,
+    # repeated tokens cost nothing.
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    symbols = [symbol_from_string(token) for token in stream]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(
+        stat.size_diff for stat in after.compare_to(before, 'filename')
+    )
+    # Don't count the list holding the symbols.
+    allocated -= sys.getsizeof(symbols)
+    return allocated / len(symbols)
+
+
+def bytes_per_symbol(stream):
+    # The size of one symbol object, with its __dict__ if it has one (the
+    # string it holds is shared with the token, so it isn't counted).
+    sizes = []
+    for token in set(stream):
+        symbol = symbol_from_string(token)
+        size = sys.getsizeof(symbol)
+        if hasattr(symbol, '__dict__'):
+            size += sys.getsizeof(symbol.__dict__)
+        sizes.append(size)
+    return sum(sizes) / len(sizes)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    stream = tokens(n)
+
+    # Memory first, while no symbol has been created yet.
+    memory = bytes_per_token(stream)
+    size = bytes_per_symbol(stream)
+    speed = symbols_per_second(stream)
+
+    print(f'tokens:           {n}')
+    print(f'symbols/sec:      {speed:,.0f}')
+    print(f'bytes per token:  {memory:.1f}')
+    print(f'bytes per symbol: {size:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,22 @@
+__version__ = '0.1.0'
+
 from .grammar import ContextFreeGrammar, ProductionRule
 from .symbol import ParseError, NonTerminal, Terminal, Epsilon, EoS
-from .control import Control
 
 
 __all__ = ['ContextFreeGrammar', 'ProductionRule',  'Control', 'ParseError',
            'NonTerminal', 'Terminal', 'Epsilon', 'EoS']
+
+
+def __getattr__(name):
+    # The GUI needs PyQt5, which the rest of the package doesn't, so it is
+    # only imported when first asked for.
+    if name == 'Control':
+        from .control import Control
+        globals()['Control'] = Control
+        return Control
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | {'Control'})
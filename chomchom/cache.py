@@ -0,0 +1,224 @@
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import warnings
+
+from . import __version__
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class AnalysisCache:
+    # Results of grammar analyses, keyed by the fingerprint of the grammar
+    # (see ContextFreeGrammar.fingerprint) and the name of the analysis, so
+    # a grammar typed again, or with its non-terminals renamed, is only
+    # analysed once. Past `maxsize` entries, the least recently used one is
+    # dropped.
+    #
+    # Values must not be changed once stored: grammars keep them in terms
+    # of canonical non-terminal numbers and translate them on the way out.
+    #
+    # Misses fall through to `store`, a DiskCache, when there is one, and
+    # new results are written to it as well.
+    #
+    # The GUI analyses grammars from worker threads, so every access holds
+    # a lock (the computing itself happens outside of it).
+    def __init__(self, maxsize: int = 256,
+                 store: Optional['DiskCache'] = None) -> None:
+        self.maxsize = maxsize
+        self.store = store
+        self.entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.lock:
+            try:
+                value = self.entries[key]
+            except KeyError:
+                value = self.store.get(key) if self.store else None
+                if value is None:
+                    self.misses += 1
+                    return None
+                self._remember(key, value)
+            else:
+                self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self.lock:
+            self._remember(key, value)
+            if self.store:
+                self.store.put(key, value)
+
+    def _remember(self, key: Hashable, value: Any) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize,
+                         len(self.entries))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+SQLITE_HEADER = b'SQLite format 3\0'
+# 'chom', stored in the header of the SQLite files DiskCache creates.
+APPLICATION_ID = 0x63686f6d
+
+
+class DiskCache:
+    # Pickled analysis results in an SQLite file, so they outlive the
+    # process. Every row records the version of chomchom that wrote it, and
+    # rows from other versions are stale: they are dropped when read, like
+    # rows that fail to unpickle. Past `max_bytes` of pickles, the least
+    # recently used rows are deleted.
+    #
+    # Opening a path that can't be used raises OSError or DatabaseError
+    # (see open_store), and so does one holding anything but a cache:
+    # files are marked as caches through the application ID in their
+    # header, and only a marked file is ever started over, when damaged.
+    # Once open, the cache is never worth an error: lookups miss and results
+    # are simply not kept.
+    def __init__(self, path: str, max_bytes: int = 64 * 2**20) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        try:
+            self.db = self._connect()
+        except sqlite3.DatabaseError:
+            if not self._marked():
+                raise
+            os.remove(path)
+            self.db = self._connect()
+
+    def _marked(self) -> bool:
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.read(100)
+        except OSError:
+            return False
+        return (len(header) == 100 and header.startswith(SQLITE_HEADER)
+                and int.from_bytes(header[68:72], 'big') == APPLICATION_ID)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Never write to someone else's file, database or not.
+        if os.path.isfile(self.path) and os.path.getsize(self.path):
+            if not self._marked():
+                raise sqlite3.DatabaseError('not an analysis cache')
+
+        db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        try:
+            with db:
+                db.execute(f'PRAGMA application_id = {APPLICATION_ID}')
+                db.execute(
+                    'CREATE TABLE IF NOT EXISTS analyses ('
+                    'key TEXT PRIMARY KEY, version TEXT NOT NULL, '
+                    'value BLOB NOT NULL, size INTEGER NOT NULL, '
+                    'used REAL NOT NULL)')
+                db.execute(
+                    'DELETE FROM analyses WHERE version != ?', (__version__,))
+        except sqlite3.DatabaseError:
+            db.close()
+            raise
+        return db
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        key = repr(key)
+        try:
+            row = self.db.execute(
+                'SELECT version, value FROM analyses WHERE key = ?',
+                (key,)).fetchone()
+            if row is None:
+                return None
+
+            version, blob = row
+            try:
+                value = pickle.loads(blob) if version == __version__ else None
+            except Exception:
+                value = None
+
+            with self.db:
+                if value is None:
+                    self.db.execute(
+                        'DELETE FROM analyses WHERE key = ?', (key,))
+                else:
+                    self.db.execute(
+                        'UPDATE analyses SET used = ? WHERE key = ?',
+                        (time.time(), key))
+            return value
+        except sqlite3.DatabaseError:
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        try:
+            with self.db:
+                self.db.execute(
+                    'INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?)',
+                    (repr(key), __version__, blob, len(blob), time.time()))
+                self._evict()
+        except sqlite3.DatabaseError:
+            pass
+
+    def _evict(self) -> None:
+        total, = self.db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM analyses').fetchone()
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+
+        oldest = []
+        for key, size in self.db.execute(
+                'SELECT key, size FROM analyses ORDER BY used'):
+            oldest.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.db.executemany('DELETE FROM analyses WHERE key = ?', oldest)
+
+    def size(self) -> int:
+        total, = self.db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM analyses').fetchone()
+        return total
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def open_store(path: str, **kwargs) -> Optional[DiskCache]:
+    # A DiskCache at `path`, or None, with a warning, if it can't be one.
+    try:
+        return DiskCache(path, **kwargs)
+    except (OSError, sqlite3.DatabaseError) as e:
+        warnings.warn(f'Not caching analyses in {path}: {e}')
+        return None
+
+
+# The cache every grammar uses. Setting CHOMCHOM_CACHE to a file name
+# backs it with a DiskCache there.
+analyses = AnalysisCache(
+    store=open_store(os.environ['CHOMCHOM_CACHE'])
+    if os.environ.get('CHOMCHOM_CACHE') else None)
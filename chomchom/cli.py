@@ -0,0 +1,139 @@
+import argparse
+import glob
+import json
+import os
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from .grammar import ContextFreeGrammar
+from .symbol import Symbol
+
+
+def _sets(sets: Dict[Symbol, Iterable[Symbol]]) -> Dict[str, List[str]]:
+    return {str(nt): sorted(str(s) for s in symbols)
+            for nt, symbols in sets.items()}
+
+
+def info(g: ContextFreeGrammar, steps: int) -> Dict[str, Any]:
+    # What Control.list_grammar_info shows.
+    size = g.language_size_class()
+    return {
+        'language': size.kind,
+        'sentences': size.sentences,
+        'derivations': size.derivations,
+        'first': _sets(g.first),
+        'follow': _sets(g.follow),
+        'first_nt': _sets(g.first_nt),
+        'factored': g.is_factored(),
+        'left_recursions': [
+            {'kind': r.kind, 'cycle': [str(nt) for nt in r.cycle]}
+            for r in g.left_recursions()
+        ],
+    }
+
+
+def proper(g: ContextFreeGrammar, steps: int) -> Dict[str, Any]:
+    return {'grammar': str(g.to_proper())}
+
+
+def factor(g: ContextFreeGrammar, steps: int) -> Dict[str, Any]:
+    g = g.copy()
+    factored = g.factor(steps)
+    return {'steps': steps, 'factored': factored, 'grammar': str(g)}
+
+
+def ll1(g: ContextFreeGrammar, steps: int) -> Dict[str, Any]:
+    conflicts = [
+        {'nt': str(c.nt),
+         'lookahead': sorted(str(s) for s in c.lookahead),
+         'alternatives': [' '.join(str(s) for s in alternative) or '&'
+                          for alternative in c.alternatives]}
+        for c in g.ll1_conflicts()
+    ]
+    return {'ll1': not conflicts, 'conflicts': conflicts}
+
+
+ANALYSES = {'info': info, 'proper': proper, 'factor': factor, 'll1': ll1}
+
+Job = Tuple[str, Sequence[str], int]
+
+
+def analyse(job: Job) -> Dict[str, Any]:
+    # Runs in the worker processes, so it only takes and returns plain
+    # data. A grammar that can't be read or analysed gets an error instead
+    # of stopping the whole batch.
+    path, analyses, steps = job
+    result: Dict[str, Any] = {'file': path}
+    try:
+        g = ContextFreeGrammar.from_file(path)
+        for name in analyses:
+            result[name] = ANALYSES[name](g, steps)
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    return result
+
+
+def grammar_files(patterns: Iterable[str]) -> List[str]:
+    # Every file under a directory, or matching a glob pattern.
+    files: List[str] = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, names in os.walk(pattern):
+                dirs.sort()
+                files.extend(
+                    os.path.join(root, name) for name in sorted(names))
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+            files.extend(path for path in matches if os.path.isfile(path))
+    return files
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m chomchom',
+        description='Analyses grammar files and writes one JSON line per '
+                    'grammar.')
+    parser.add_argument(
+        'paths', nargs='+', metavar='PATH',
+        help='grammar file, directory or glob pattern')
+    parser.add_argument(
+        '-a', '--analyses', default='info',
+        help='comma separated, from: ' + ', '.join(ANALYSES) +
+             ' (default: info)')
+    parser.add_argument(
+        '-n', '--steps', type=int, default=10,
+        help='factoring steps (default: 10)')
+    parser.add_argument(
+        '-j', '--workers', type=int, default=os.cpu_count() or 1,
+        help='worker processes (default: one per CPU)')
+    args = parser.parse_args(argv)
+
+    analyses = [name.strip() for name in args.analyses.split(',')]
+    unknown = [name for name in analyses if name not in ANALYSES]
+    if unknown:
+        parser.error(f'unknown analyses: {", ".join(unknown)}')
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+
+    files = grammar_files(args.paths)
+    if not files:
+        parser.error('no grammar files found')
+    jobs = [(path, analyses, args.steps) for path in files]
+
+    if args.workers == 1:
+        _write(map(analyse, jobs))
+    else:
+        # Results come back in the order of the files, a chunk of them at
+        # a time, and are written as soon as they do.
+        chunksize = max(1, min(64, len(jobs) // (args.workers * 8)))
+        with ProcessPoolExecutor(args.workers) as executor:
+            _write(executor.map(analyse, jobs, chunksize=chunksize))
+    return 0
+
+
+def _write(results: Iterable[Dict[str, Any]]) -> None:
+    for result in results:
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + '\n')
+        sys.stdout.flush()
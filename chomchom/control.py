@@ -2,10 +2,13 @@ from .gui import MainWindow
 
 from pprint import pformat
 
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from PyQt5 import QtCore as qtc
 
 from .grammar import ContextFreeGrammar, ParseError
 from .utils import format_dict
+from .workers import Task
 
 
 class Control:
@@ -13,8 +16,46 @@ class Control:
         self.main_window = MainWindow(self)
         self.grammars: List[ContextFreeGrammar] = []
 
+        # Analyses run on the pool, and their results come back to the
+        # main thread through signals, so the window never blocks.
+        self.pool = qtc.QThreadPool.globalInstance()
+        self.running: Set[Task] = set()
+        # The latest task of each kind that a new request supersedes.
+        self.latest: Dict[str, Task] = {}
+
         self.main_window.show()
 
+    def __start(
+        self,
+        work: Callable[[Callable[[], bool]], Any],
+        on_result: Callable[[Any], None],
+        kind: Optional[str] = None,
+    ):
+        task = Task(work)
+
+        if kind is not None:
+            previous = self.latest.get(kind)
+            if previous is not None:
+                previous.cancel()
+            self.latest[kind] = task
+
+        def finished(result):
+            if kind is None or self.latest.get(kind) is task:
+                on_result(result)
+
+        def done():
+            self.running.discard(task)
+            if kind is not None and self.latest.get(kind) is task:
+                del self.latest[kind]
+
+        task.signals.finished.connect(finished)
+        task.signals.failed.connect(self.main_window.append_output)
+        task.signals.done.connect(done)
+        # Python has to keep the task (and so its signals) alive until it
+        # is done.
+        self.running.add(task)
+        self.pool.start(task)
+
     def __append_grammar(self, grammar):
         self.grammars.append(grammar)
         self.main_window.update_combo_boxes(len(self.grammars))
@@ -22,66 +63,111 @@ class Control:
     def create_grammar_from_string(self, string):
         try:
             g = ContextFreeGrammar.from_string(string)
+            same = [i for i, other in enumerate(self.grammars)
+                    if other.fingerprint() == g.fingerprint()]
             self.grammars.append(g)
             self.main_window.update_combo_boxes(len(self.grammars))
             self.main_window.append_output(
                 f'Gramática G{len(self.grammars)-1} criada com sucesso.\n')
+            if same:
+                self.main_window.append_output(
+                    f'Idêntica a G{same[0]}, a menos de nomes e da ordem das alternativas.\n')
         except (ParseError):
             self.main_window.append_output('Gramática inválida.\n')
 
     def to_proper(self, index: int):
         g = self.grammars[index]
 
-        # 1. Transformar em &-livre
-        g1, ne = g.to_epsilon_free()
-        self.__append_grammar(g1)
-        self.main_window.append_output(f'Ne: {pformat(ne)}\n')
-        self.main_window.append_output(
-            f'Gramática intermediária G{len(self.grammars)-1} &-Livre criada.')
-
-        # 2. Remover ciclos (Produções simples)
-        ns = g1.simple_production_sets()
-        g2 = g1.without_simple_productions()
-        self.__append_grammar(g1)
-        self.main_window.append_output(f'Ne: {pformat(ns)}\n')
-        self.main_window.append_output(
-            f'Gramática intermediária G{len(self.grammars)-1} &-Livre criada.')
-
-        # 3. Remover Símbolos inúteis
-        g3, nf = g2.remove_infertile()
-        self.__append_grammar(g2)
-        self.main_window.append_output(f'NF: {pformat(nf)}\n')
-        self.main_window.append_output(
-            f'Gramática intermediária G{len(self.grammars)-1} sem símbolos inférteis criada.')
-
-        g4, vi = g3.remove_unreachable()
-        self.__append_grammar(g3)
-        self.main_window.append_output(f'vi: {pformat(vi)}\n')
-        self.main_window.append_output(
-            f'Gramática intermediária G{len(self.grammars)-1} sem símbolos inalcançáveis criada.')
+        def work(should_stop):
+            # 1. Transformar em &-livre
+            g1, ne = g.to_epsilon_free()
+            # 2. Remover ciclos (Produções simples)
+            ns = g1.simple_production_sets()
+            g2 = g1.without_simple_productions()
+            # 3. Remover Símbolos inúteis
+            g3, nf = g2.remove_infertile()
+            g4, vi = g3.remove_unreachable()
+            return [
+                (g1, f'Ne: {pformat(ne)}\n', '&-Livre criada.'),
+                (g2, f'Na: {pformat(ns)}\n', 'sem ciclos criada.'),
+                (g3, f'NF: {pformat(nf)}\n',
+                 'sem símbolos inférteis criada.'),
+                (g4, f'vi: {pformat(vi)}\n',
+                 'sem símbolos inalcançáveis criada.'),
+            ]
+
+        def show(steps):
+            for grammar, sets, created in steps:
+                self.__append_grammar(grammar)
+                self.main_window.append_output(sets)
+                self.main_window.append_output(
+                    f'Gramática intermediária G{len(self.grammars)-1} '
+                    f'{created}')
+
+        self.__start(work, show)
+
+    def eliminate_left_recursions(self, index: int):
+        g = self.grammars[index]
+
+        def work(should_stop):
+            recursions = g.left_recursions()
+            if not recursions:
+                return recursions, None
+            return recursions, g.remove_left_recursion()
+
+        def show(result):
+            recursions, without = result
+            if not recursions:
+                self.main_window.append_output(
+                    f'G{index} não possui recursão à esquerda.\n')
+                return
+
+            kinds = {'direct': 'direta', 'indirect': 'indireta'}
+            for recursion in recursions:
+                cycle = ', '.join(str(nt) for nt in recursion.cycle)
+                self.main_window.append_output(
+                    f'Recursão {kinds[recursion.kind]}: {cycle}')
+
+            self.__append_grammar(without)
+            self.main_window.append_output(
+                f'Gramática G{len(self.grammars)-1} sem recursão à esquerda criada.\n')
+
+        self.__start(work, show)
 
     def factored_in(self, index: int, steps: int):
-        g = self.grammars[index].copy()
+        # Turning the dial asks again before the last answer is in, and
+        # only the last question matters.
+        g = self.grammars[index]
+
+        def work(should_stop):
+            if g.is_factorable(steps, should_stop):
+                return "Sim"
+            return "Não"
 
-        if g.factor(steps):
-            return "Sim"
-        return "Não"
+        self.__start(work, self.main_window.show_factorable, 'factoring')
 
     def list_grammar_info(self, index: int):
         g = self.grammars[index]
+        self.__start(
+            lambda should_stop: self.__grammar_info(g, index),
+            self.main_window.append_output)
 
+    @staticmethod
+    def __grammar_info(g: ContextFreeGrammar, index: int) -> str:
         g_info = f"Informações sobre G{index}:\n"
 
         # L(G) é vazia, infinitia ou finita
         g_info += f"L(G{index}) é "
-        if g.is_empty():
+        size = g.language_size_class()
+        if size.kind == 'empty':
             g_info += "vazia."
-        else:
+        elif size.kind == 'infinite':
             g_info += "infinita."
-        # elif g.is_infinite():
-        #     g_info += "infinita."
-        # else:
-        #     g_info += "finita."
+        else:
+            if size.sentences is not None:
+                g_info += f"finita ({size.sentences} sentenças)."
+            else:
+                g_info += f"finita (no máximo {size.derivations} sentenças)."
         g_info += '\n\n'
 
         # FIRST(A)
@@ -106,4 +192,11 @@ class Control:
             g_info += f"G{index} não está fatorada\n"
         g_info += '\n'
 
-        self.main_window.append_output(g_info)
+        # Recursão à esquerda
+        if g.has_left_recursion():
+            g_info += f"G{index} possui recursão à esquerda\n"
+        else:
+            g_info += f"G{index} não possui recursão à esquerda\n"
+        g_info += '\n'
+
+        return g_info
@@ -0,0 +1,153 @@
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .ll1 import token_columns
+from .symbol import bits
+
+# NumPy takes longer to import than the rest of chomchom, so it is only
+# loaded once a recognizer that uses it is built.
+np = None
+
+
+def import_numpy() -> bool:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+class CYKRecognizer:
+    # CYK over the Chomsky normal form of the grammar. Chart cells are
+    # bitsets of non-terminals: plain ints, or with `use_numpy`, rows of a
+    # boolean NumPy array, where every span length is handled in one batch,
+    # for all start positions and split points.
+    #
+    # The ints are the default: with cells combined through `_combined`,
+    # they are as fast as NumPy on small grammars and several times faster
+    # on larger ones (see benchmarks/bench_cyk.py).
+    def __init__(self, grammar, use_numpy: bool = False) -> None:
+        cnf = grammar.to_cnf()
+        table = cnf.production_rules
+
+        if use_numpy and not import_numpy():
+            raise ImportError('NumPy is needed for use_numpy=True')
+        self.use_numpy = use_numpy
+
+        self.grammar = cnf
+        self.columns = token_columns(table.symbols)
+        self.start = table.id(cnf.start_symbol)
+        self.accepts_empty = () in table.encoded(self.start)
+
+        # terminal ID -> non-terminals producing it
+        self.units: Dict[int, int] = {}
+        # (B, C, A) for every A -> B C
+        self.rules: List[Tuple[int, int, int]] = []
+        # B -> [(C, mask of every A with A -> B C)]
+        self.by_left: Dict[int, List[Tuple[int, int]]] = {}
+
+        for lhs, rhs in zip(table.lhs, table.rhs):
+            if len(rhs) == 1 and rhs[0] < 0:
+                self.units[~rhs[0]] = self.units.get(~rhs[0], 0) | 1 << lhs
+            elif len(rhs) == 2:
+                self.rules.append((rhs[0], rhs[1], lhs))
+
+        pairs: Dict[Tuple[int, int], int] = {}
+        for b, c, a in self.rules:
+            pairs[b, c] = pairs.get((b, c), 0) | 1 << a
+        for (b, c), mask in pairs.items():
+            self.by_left.setdefault(b, []).append((c, mask))
+
+        # Combining two cells only depends on their contents, which repeat
+        # a lot within and across sentences.
+        self._combined: Dict[Tuple[int, int], int] = {}
+
+        if use_numpy:
+            self._prepare_numpy(len(table.symbols.non_terminals))
+
+    def recognize(self, tokens: Iterable) -> bool:
+        columns = self.columns
+        units = self.units
+        cells = []
+        for token in tokens:
+            t = columns.get(token)
+            cells.append(units.get(t, 0) if t is not None else 0)
+
+        if not cells:
+            return self.accepts_empty
+        if not all(cells):
+            return False
+
+        if self.use_numpy:
+            return self._recognize_numpy(cells)
+        return self._recognize_ints(cells)
+
+    def recognize_many(self, sentences: Iterable[Iterable]) -> List[bool]:
+        return [self.recognize(sentence) for sentence in sentences]
+
+    def _combine(self, left: int, right: int) -> int:
+        result = 0
+        by_left = self.by_left
+        for b in bits(left):
+            for c, mask in by_left.get(b, ()):
+                if right >> c & 1:
+                    result |= mask
+        return result
+
+    def _recognize_ints(self, units: Sequence[int]) -> bool:
+        n = len(units)
+        combined = self._combined
+        # chart[length - 1][start] = non-terminals deriving the span
+        chart = [list(units)]
+
+        for length in range(2, n + 1):
+            row = []
+            for start in range(n - length + 1):
+                cell = 0
+                for split in range(1, length):
+                    left = chart[split - 1][start]
+                    right = chart[length - split - 1][start + split]
+                    if left and right:
+                        key = (left, right)
+                        result = combined.get(key)
+                        if result is None:
+                            result = combined[key] = self._combine(*key)
+                        cell |= result
+                row.append(cell)
+            chart.append(row)
+
+        return bool(chart[n - 1][0] >> self.start & 1)
+
+    def _prepare_numpy(self, size: int) -> None:
+        self.size = size
+        self.lefts = np.array([b for b, c, a in self.rules], dtype=np.intp)
+        self.rights = np.array([c for b, c, a in self.rules], dtype=np.intp)
+        # rules x non-terminals, 1 where the rule produces the non-terminal
+        self.produces = np.zeros((len(self.rules), size), dtype=np.intp)
+        for r, (b, c, a) in enumerate(self.rules):
+            self.produces[r, a] = 1
+
+    def _recognize_numpy(self, units: Sequence[int]) -> bool:
+        n = len(units)
+        size = self.size
+
+        # chart[start, length] = non-terminals deriving the span
+        chart = np.zeros((n, n + 1, size), dtype=bool)
+        for start, mask in enumerate(units):
+            chart[start, 1, list(bits(mask))] = True
+
+        for length in range(2, n + 1):
+            starts = np.arange(n - length + 1)[:, None]
+            splits = np.arange(1, length)[None, :]
+
+            # left[i, k] and right[i, k]: the two halves of the span of
+            # `length` at `i`, split after `k` tokens.
+            left = chart[starts, splits]
+            right = chart[starts + splits, length - splits]
+
+            fired = (left[:, :, self.lefts] & right[:, :, self.rights]).any(axis=1)
+            chart[:n - length + 1, length] = fired.astype(np.intp) @ self.produces > 0
+
+        return bool(chart[0, n, self.start])
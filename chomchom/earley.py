@@ -0,0 +1,306 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .ll1 import Node, END, token_columns
+from .symbol import ParseError
+
+
+class Chart:
+    # The Earley sets of one parse. An item is the int
+    # `origin * width + offsets[p] + dot`, and each position keeps, besides
+    # its set of items, the items waiting on each non-terminal (for
+    # completion) and on each terminal (for scanning), so no step ever
+    # searches a set.
+    def __init__(self) -> None:
+        self.items: List[Set[int]] = []
+        self.waiting: List[Dict[int, List[int]]] = []
+        self.scans: List[Dict[int, List[int]]] = []
+        # completed[j][A][i] = productions of A that derive tokens[i:j]
+        self.completed: List[Dict[int, Dict[int, List[int]]]] = []
+        self.tokens: List[Any] = []
+
+
+class ForestNode:
+    # A node of a shared packed parse forest, covering tokens[start:end].
+    #
+    # Symbol nodes are labelled with a NonTerminal, and each of their
+    # families is a `(production, node)` pair, where `node` is the
+    # intermediate node covering the whole right-hand side (None for an
+    # empty one). Intermediate nodes are labelled with `(production, dot)`
+    # and cover the first `dot` symbols, and each of their families is a
+    # `(left, right)` pair: the intermediate node for the first `dot - 1`
+    # symbols (None when dot is 1) and the ForestNode or token for the
+    # symbol before the dot.
+    #
+    # Every (label, start, end) has a single node, so ambiguous inputs give
+    # a forest of polynomial size however many trees it packs.
+    __slots__ = ('label', 'start', 'end', 'families')
+
+    def __init__(self, label, start: int, end: int) -> None:
+        self.label = label
+        self.start = start
+        self.end = end
+        self.families: List[Tuple[Any, Any]] = []
+
+    def __repr__(self) -> str:
+        return f'ForestNode({self.label!r}, {self.start}, {self.end})'
+
+
+class EarleyParser:
+    # Earley's algorithm, with nullable non-terminals handled as proposed
+    # by Aycock and Horspool (2002): predicting a nullable non-terminal
+    # also moves the dot over it right away, so completing an empty
+    # derivation never has to look back into the set being built.
+    def __init__(self, grammar) -> None:
+        table = grammar.production_rules
+
+        self.productions = table
+        self.start = table.id(grammar.start_symbol)
+        self.nullable = grammar._nullable_ids
+        self.columns = token_columns(table.symbols)
+        self.non_terminals = table.symbols.non_terminals
+
+        # Every LR(0) item gets a number: offsets[p] + dot.
+        self.offsets: List[int] = []
+        self.next: List[Optional[int]] = []
+        self.item_production: List[int] = []
+        for p, rhs in enumerate(table.rhs):
+            self.offsets.append(len(self.next))
+            self.next.extend(rhs)
+            self.next.append(None)
+            self.item_production.extend([p] * (len(rhs) + 1))
+        self.width = len(self.next)
+
+    def recognize(self, tokens: Iterable) -> bool:
+        return self._chart(tokens, forest=False) is not None
+
+    def parse_forest(self, tokens: Iterable) -> ForestNode:
+        chart = self._chart(tokens, forest=True)
+        if chart is None:
+            raise ParseError('The sentence is not in the language')
+        return self._forest(chart)
+
+    def parse(self, tokens: Iterable) -> Node:
+        # Any one of the parse trees.
+        return first_tree(self.parse_forest(tokens))
+
+    def _chart(self, tokens: Iterable, forest: bool) -> Optional[Chart]:
+        table = self.productions
+        offsets = self.offsets
+        next_code = self.next
+        item_production = self.item_production
+        width = self.width
+        nullable = self.nullable
+        columns = self.columns
+
+        start = range(*table.ranges.get(self.start, (0, 0)))
+
+        chart = Chart()
+        i = 0
+        agenda = [offsets[p] for p in start]
+        tokens = iter(tokens)
+        while True:
+            items: Set[int] = set()
+            waiting: Dict[int, List[int]] = {}
+            scans: Dict[int, List[int]] = {}
+            completed: Dict[int, Dict[int, List[int]]] = {}
+            predicted: Set[int] = set()
+            chart.items.append(items)
+            chart.waiting.append(waiting)
+            chart.scans.append(scans)
+            chart.completed.append(completed)
+
+            base = i * width
+            pending = []
+            for item in agenda:
+                if item not in items:
+                    items.add(item)
+                    pending.append(item)
+
+            while pending:
+                item = pending.pop()
+                origin, lr0 = divmod(item, width)
+                code = next_code[lr0]
+
+                if code is None:
+                    p = item_production[lr0]
+                    nt = table.lhs[p]
+                    if forest:
+                        completed.setdefault(nt, {}).setdefault(
+                            origin, []).append(p)
+                    # Completing an empty derivation (origin == i) is taken
+                    # care of when predicting nullable non-terminals.
+                    if origin != i:
+                        for parent in chart.waiting[origin].get(nt, ()):
+                            if parent + 1 not in items:
+                                items.add(parent + 1)
+                                pending.append(parent + 1)
+
+                elif code >= 0:
+                    waiting.setdefault(code, []).append(item)
+                    if code not in predicted:
+                        predicted.add(code)
+                        for p in range(*table.ranges.get(code, (0, 0))):
+                            new = base + offsets[p]
+                            if new not in items:
+                                items.add(new)
+                                pending.append(new)
+                    if code in nullable and item + 1 not in items:
+                        items.add(item + 1)
+                        pending.append(item + 1)
+
+                else:
+                    scans.setdefault(~code, []).append(item)
+
+            token = next(tokens, END)
+            if token is END:
+                break
+
+            agenda = [item + 1 for item in scans.get(columns.get(token), ())]
+            if not agenda:
+                return None
+
+            chart.tokens.append(token)
+            i += 1
+
+        accepted = any(offsets[p] + len(table.rhs[p]) in items for p in start)
+        return chart if accepted else None
+
+    def _forest(self, chart: Chart) -> ForestNode:
+        table = self.productions
+        offsets = self.offsets
+        width = self.width
+        tokens = chart.tokens
+        non_terminals = self.non_terminals
+
+        # Nodes are keyed by non-terminal ID or by (production, dot).
+        nodes: Dict[Tuple[Any, int, int], ForestNode] = {}
+        unfilled: List[Tuple[Any, ForestNode]] = []
+
+        def node(key, start, end):
+            found = nodes.get((key, start, end))
+            if found is None:
+                label = key if isinstance(key, tuple) else non_terminals[key]
+                found = nodes[key, start, end] = ForestNode(label, start, end)
+                unfilled.append((key, found))
+            return found
+
+        root = node(self.start, 0, len(tokens))
+
+        while unfilled:
+            key, current = unfilled.pop()
+            i, j = current.start, current.end
+
+            if not isinstance(key, tuple):
+                for p in chart.completed[j][key].get(i, ()):
+                    n = len(table.rhs[p])
+                    current.families.append(
+                        (p, node((p, n), i, j) if n else None))
+                continue
+
+            p, dot = key
+            code = table.rhs[p][dot - 1]
+            # Where the symbol before the dot can start.
+            if code < 0:
+                splits = [(j - 1, tokens[j - 1])]
+            else:
+                splits = [
+                    (k, node(code, k, j))
+                    for k in chart.completed[j].get(code, ())
+                    if k >= i
+                ]
+
+            for k, right in splits:
+                if dot == 1:
+                    if k == i:
+                        current.families.append((None, right))
+                elif i * width + offsets[p] + dot - 1 in chart.items[k]:
+                    current.families.append((node((p, dot - 1), i, k), right))
+
+        return root
+
+
+def first_tree(forest: ForestNode) -> Node:
+    # One parse tree, built without recursion, so it works for inputs of
+    # any length. A node can only use a family once all of its children
+    # have a tree, which keeps cycles of the grammar out of it.
+    order = []
+    seen = {forest}
+    stack = [forest]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        for family in node.families:
+            for child in family:
+                if isinstance(child, ForestNode) and child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+
+    def ready(child):
+        return not isinstance(child, ForestNode) or child in chosen
+
+    chosen: Dict[ForestNode, Tuple[Any, Any]] = {}
+    changed = True
+    while changed:
+        changed = False
+        # Children mostly come after their parents in `order`.
+        for node in reversed(order):
+            if node not in chosen:
+                for family in node.families:
+                    if all(ready(child) for child in family):
+                        chosen[node] = family
+                        changed = True
+                        break
+
+    root = Node(forest.label, [])
+    stack = [(forest, root)]
+    while stack:
+        node, tree = stack.pop()
+        _, rhs = chosen[node]
+
+        # Follow the chain of intermediate nodes, which gives the symbols
+        # of the right-hand side last to first.
+        symbols = []
+        while rhs is not None:
+            rhs, symbol = chosen[rhs]
+            symbols.append(symbol)
+
+        for symbol in reversed(symbols):
+            if isinstance(symbol, ForestNode):
+                child = Node(symbol.label, [])
+                stack.append((symbol, child))
+                tree.children.append(child)
+            else:
+                tree.children.append(symbol)
+
+    return root
+
+
+def trees(forest: ForestNode) -> Iterator[Node]:
+    # Unpacks a forest into its parse trees, lazily, since there can be
+    # exponentially many. Derivations that go around a cycle of the grammar
+    # (A =>+ A) are left out, so there is always a finite number of them.
+    yield from _trees(forest, frozenset())
+
+
+def _trees(node: ForestNode, path: frozenset) -> Iterator[Node]:
+    if node in path:
+        return
+    path = path | {node}
+
+    for p, rhs in node.families:
+        if rhs is None:
+            yield Node(node.label, [])
+        else:
+            for children in _sequences(rhs, path):
+                yield Node(node.label, children)
+
+
+def _sequences(node: ForestNode, path: frozenset) -> Iterator[List[Any]]:
+    for left, right in node.families:
+        lefts = _sequences(left, path) if left is not None else [[]]
+        for prefix in lefts:
+            if isinstance(right, ForestNode):
+                for tree in _trees(right, path):
+                    yield [*prefix, tree]
+            else:
+                yield [*prefix, right]
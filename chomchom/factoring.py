@@ -0,0 +1,64 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+import threading
+
+
+class Cancelled(Exception):
+    pass
+
+
+class FactoringSearch:
+    # The grammars reached from one grammar by factor steps. A step is
+    # deterministic, so they form a chain, which is extended as far as
+    # needed and never recomputed: answering for n + 1 steps after n only
+    # takes one more step. Each state is identified by the canonical form
+    # of its grammar, and reaching one seen before means the chain loops
+    # without ever getting factored.
+    #
+    # Expanding left recursive alternatives can double the size of the
+    # grammar at every step, so the search also gives up once a state
+    # grows past `limit` symbols.
+    #
+    # Runs can be stopped between steps through `should_stop`, without
+    # losing the steps already taken, and only one runs at a time.
+    def __init__(self, grammar, limit: int = None) -> None:
+        self.states = [grammar.copy()]
+        self.seen: Dict[Tuple, int] = {grammar._canonical: 0}
+        self.done = grammar.is_factored()
+        self.gave_up = False
+        if limit is None:
+            limit = max(10_000, 50 * _size(grammar))
+        self.limit = limit
+        self.lock = threading.Lock()
+
+    def run(
+        self,
+        max_steps: int,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> List:
+        # The states up to `max_steps` steps, stopping at the first
+        # factored one. Raises Cancelled once `should_stop()` is true.
+        with self.lock:
+            return self._run(max_steps, should_stop)
+
+    def _run(self, max_steps, should_stop) -> List:
+        states = self.states
+        while not self.done and len(states) <= max_steps:
+            if should_stop is not None and should_stop():
+                raise Cancelled
+            state = states[-1].copy()
+            state.factor_step()
+
+            key = state._canonical
+            if key in self.seen or _size(state) > self.limit:
+                self.done = self.gave_up = True
+                break
+            self.seen[key] = len(states)
+            states.append(state)
+            self.done = state.is_factored()
+
+        return states[:max_steps + 1]
+
+
+def _size(grammar) -> int:
+    return sum(len(rhs) + 1 for rhs in grammar.production_rules.rhs)
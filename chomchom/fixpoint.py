@@ -0,0 +1,104 @@
+from typing import Dict, Hashable, Iterable, List, Mapping, TypeVar
+
+Node = TypeVar('Node', bound=Hashable)
+Value = TypeVar('Value')
+
+
+def strongly_connected_components(
+    nodes: Iterable[Node],
+    edges: Mapping[Node, Iterable[Node]],
+) -> List[List[Node]]:
+    # Iterative Tarjan, so long dependency chains don't hit the recursion
+    # limit. Components come out in reverse topological order: every
+    # component is emitted after all the components it has edges to.
+    index: Dict[Node, int] = {}
+    lowlink: Dict[Node, int] = {}
+    on_stack = set()
+    stack: List[Node] = []
+    components: List[List[Node]] = []
+
+    for root in nodes:
+        if root in index:
+            continue
+
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(edges.get(root, ())))]
+
+        while work:
+            node, successors = work[-1]
+
+            for succ in successors:
+                if succ not in index:
+                    index[succ] = lowlink[succ] = len(index)
+                    stack.append(succ)
+                    on_stack.add(succ)
+                    work.append((succ, iter(edges.get(succ, ()))))
+                    break
+                elif succ in on_stack:
+                    lowlink[node] = min(lowlink[node], index[succ])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+    return components
+
+
+def solve_unions(
+    nodes: Iterable[Node],
+    base: Mapping[Node, Value],
+    deps: Mapping[Node, Iterable[Node]],
+    empty: Value,
+) -> Dict[Node, Value]:
+    # Least solution of `value[n] = base[n] | value[m] for m in deps[n]`.
+    #
+    # Every node of a strongly connected component ends up with the same
+    # value, so each component is solved once, after the components it
+    # depends on, and no set is ever revisited. Values only need to support
+    # `|`, so this works for Python sets and for int bitmasks alike.
+    value: Dict[Node, Value] = {}
+
+    # Nodes without dependencies are solved right away and kept out of the
+    # search for components, which matters when they are most of them.
+    edges = {
+        node: [dep for dep in node_deps if deps.get(dep)]
+        for node, node_deps in deps.items()
+        if node_deps
+    }
+    roots = []
+    for node in nodes:
+        if node in edges:
+            roots.append(node)
+        else:
+            value[node] = empty | base.get(node, empty)
+
+    for component in strongly_connected_components(roots, edges):
+        members = set(component)
+        acc = empty | empty
+
+        for node in component:
+            acc |= base.get(node, empty)
+            for dep in deps[node]:
+                if dep in members:
+                    continue
+                if dep not in value:
+                    value[dep] = empty | base.get(dep, empty)
+                acc |= value[dep]
+
+        for node in component:
+            value[node] = acc
+
+    return value
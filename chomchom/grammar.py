@@ -1,15 +1,31 @@
-from typing import List, NamedTuple, Dict, Set, DefaultDict, Iterable, KeysView
-
-from itertools import combinations
-
-from copy import deepcopy
-
-from .utils import powerset
-
-from .symbol import Symbol, Terminal, Epsilon, NonTerminal, EoS
-from .symbol import symbol_from_string, ParseError
+from typing import List, NamedTuple, Dict, Set, Iterable, KeysView
+from typing import Any, FrozenSet, Iterator, Mapping, Optional, Tuple
+from types import MappingProxyType
+
+from itertools import combinations, chain
+import hashlib
+import threading
+
+from .utils import powerset, memoized
+from .fixpoint import solve_unions, strongly_connected_components
+from . import incremental
+from .reader import read_productions
+from .productions import ProductionTable, Encoded
+from .ll1 import LL1Table
+from .lalr import LALRTable
+from .earley import EarleyParser
+from .cyk import CYKRecognizer
+from .factoring import FactoringSearch
+from .cache import analyses
+
+from .symbol import Symbol, Terminal, Epsilon, NonTerminal
+from .symbol import ParseError, SymbolTable, bits
 
 EPSILON = Epsilon('&')
+EPSILON_BIT = 1 << SymbolTable.EPSILON_ID
+EOS_BIT = 1 << SymbolTable.EOS_ID
+
+_factoring_lock = threading.Lock()
 
 
 class ProductionRule(NamedTuple):
@@ -17,59 +33,165 @@ class ProductionRule(NamedTuple):
     rhs: List[Symbol]
 
 
+class Conflict(NamedTuple):
+    nt: NonTerminal
+    lookahead: Set[Symbol]
+    alternatives: Tuple[Tuple[Symbol, ...], ...]
+
+
+class LeftRecursion(NamedTuple):
+    kind: str  # 'direct' or 'indirect'
+    cycle: Tuple[NonTerminal, ...]
+
+
+class LanguageSize(NamedTuple):
+    kind: str  # 'empty', 'finite' or 'infinite'
+    # The exact number of sentences, None if infinite or too many to list
+    # for an ambiguous grammar.
+    sentences: Optional[int]
+    # The number of derivations, an upper bound on the number of sentences.
+    derivations: Optional[int]
+
+
+# Sentences of a finite language that language_size_class is willing to
+# list, when counting derivations is not enough.
+SENTENCE_LIMIT = 100_000
+
+
+def _lookahead_groups(start: int, stop: int, predict) -> Dict[Tuple[int, ...], int]:
+    # Groups the lookaheads predicting more than one of the productions in
+    # range(start, stop) by the productions they predict. A first pass finds
+    # which lookaheads are shared at all, so the common case of no conflict
+    # costs one `&` per production.
+    seen = shared = 0
+    for p in range(start, stop):
+        mask = predict(p)
+        shared |= seen & mask
+        seen |= mask
+
+    if not shared:
+        return {}
+
+    predicted: Dict[int, List[int]] = {}
+    for p in range(start, stop):
+        for bit in bits(predict(p) & shared):
+            predicted.setdefault(bit, []).append(p)
+
+    groups: Dict[Tuple[int, ...], int] = {}
+    for bit, productions in predicted.items():
+        group = tuple(productions)
+        groups[group] = groups.get(group, 0) | 1 << bit
+    return groups
+
+
+def _binarize(
+    head: int,
+    rhs: Encoded,
+    rows: Dict[int, List[Encoded]],
+    suffixes: Dict[Encoded, int],
+    fresh,
+    base: NonTerminal,
+) -> None:
+    # Adds `head -> rhs` to `rows` as a chain of two-symbol productions,
+    # through a new non-terminal for each suffix of `rhs` that `suffixes`
+    # doesn't have one for yet.
+    while len(rhs) > 2:
+        rest = rhs[1:]
+        nt = suffixes.get(rest)
+        if nt is not None:
+            rows[head].append((rhs[0], nt))
+            return
+        nt = suffixes[rest] = fresh(base)
+        rows[nt] = []
+        rows[head].append((rhs[0], nt))
+        head, rhs = nt, rest
+    rows[head].append(rhs)
+
+
+class _TrieNode:
+    # Alternatives ending at a node are marked with a None child, which
+    # keeps their place among the others.
+    __slots__ = ('children',)
+
+    def __init__(self) -> None:
+        self.children: Dict[Optional[int], '_TrieNode'] = {}
+
+    def insert(self, rhs: Encoded) -> None:
+        node = self
+        for code in (*rhs, None):
+            child = node.children.get(code)
+            if child is None:
+                child = node.children[code] = _TrieNode()
+            node = child
+
+
 class ContextFreeGrammar:
     def __init__(
         self,
         production_rules: Iterable[ProductionRule],
         start_symbol: NonTerminal
     ) -> None:
-        self.production_rules = (
-            DefaultDict[NonTerminal, List[List[Symbol]]](list)
-        )
-        for lhs, rhs in production_rules:
-            self.production_rules[lhs].append(rhs)
+        table = ProductionTable.build(production_rules)
+        table.symbols.intern(start_symbol)
+        self._init(table, start_symbol)
 
+    def _init(self, table: ProductionTable, start_symbol: NonTerminal) -> None:
         self.start_symbol = start_symbol
+        self._set_table(table)
 
-        self.first = DefaultDict[Symbol, Set[Symbol]](set)
-        self.first_nt = DefaultDict[Symbol, Set[Symbol]](set)
-        self.follow = DefaultDict[Symbol, Set[Symbol]](set)
-        self.calculate_follow()
-        self.calculate_first_nt()
+    def _set_table(self, table: ProductionTable) -> None:
+        # Every analysis is derived from the production table, so replacing
+        # it is the one place where cached results go stale.
+        self._table = table
+        self._cache: Dict[str, Any] = {}
+
+    @classmethod
+    def _from_table(
+        cls,
+        table: ProductionTable,
+        start_symbol: NonTerminal,
+    ) -> 'ContextFreeGrammar':
+        table.symbols.intern(start_symbol)
+        grammar = cls.__new__(cls)
+        grammar._init(table, start_symbol)
+        return grammar
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Cached analyses are left out of pickles, which only need the
+        # productions.
+        state = self.__dict__.copy()
+        state['_cache'] = {}
+        return state
 
     def copy(self) -> 'ContextFreeGrammar':
-        return deepcopy(self)
+        # The production table is immutable and so are the cached analyses,
+        # so both can be shared until one of the grammars is changed.
+        grammar = type(self).__new__(type(self))
+        grammar.__dict__.update(self.__dict__)
+        grammar._cache = self._cache.copy()
+        # Except for the occurrence index, which edits update in place.
+        grammar._cache.pop('_users', None)
+        return grammar
 
     @classmethod
     def from_string(cls, string: str) -> 'ContextFreeGrammar':
-        production_rules: List[ProductionRule] = []
-
-        for i, line in enumerate(string.strip().splitlines()):
-            try:
-                lhs, line_rhs = line.split('->')
-            except ValueError:
-                raise ParseError(f'Expected a `->` on line {i+1}')
+        return cls.from_lines(string.splitlines())
 
-            nt = NonTerminal(lhs.strip())
-
-            if i == 0:
-                start_symbol = nt
-
-            for prod_rhs in line_rhs.split('|'):
-                production = ProductionRule(nt, [])
-
-                for symbol in prod_rhs.strip().split():
-                    production.rhs.append(symbol_from_string(symbol))
+    @classmethod
+    def from_file(cls, path) -> 'ContextFreeGrammar':
+        with open(path, encoding='utf-8') as f:
+            return cls.from_lines(f)
 
-                if not production.rhs:
-                    raise ParseError(
-                        'Expected a sequence of symbols next to the `|`'
-                        f'on line {i+1}'
-                    )
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> 'ContextFreeGrammar':
+        productions = read_productions(lines)
 
-                production_rules.append(production)
+        try:
+            start_symbol, rhs = next(productions)
+        except StopIteration:
+            raise ParseError('Expected at least one production rule')
 
-        return cls(production_rules, start_symbol)
+        return cls(chain([(start_symbol, rhs)], productions), start_symbol)
 
     def __str__(self):
         return '\n'.join(
@@ -84,32 +206,98 @@ class ContextFreeGrammar:
         )
 
     @property
-    def terminals(self):
+    def production_rules(self) -> ProductionTable:
+        return self._table
+
+    @property
+    def symbols(self) -> SymbolTable:
+        return self._table.symbols
+
+    @property
+    @memoized
+    def terminals(self) -> FrozenSet[Terminal]:
         terminals = set()
-        for rhs in self.production_rules.values():
-            for prod in rhs:
-                for symbol in prod:
-                    if isinstance(symbol, Terminal):
-                        terminals.add(symbol)
+        for rhs in set(self._table.rhs):
+            for code in rhs:
+                if code < 0:
+                    terminals.add(self.symbols.decode(code))
 
-        return terminals
+        return frozenset(s for s in terminals if isinstance(s, Terminal))
 
     @property
     def non_terminals(self) -> KeysView['NonTerminal']:
         return self.production_rules.keys()
 
     def find_nondeterminisms(self):
-        for nt, prods in self.production_rules.copy().items():
-            for a, b in combinations(prods, 2):
-                if self.first_of_string(a) & self.first_of_string(b):
-                    yield (nt, a, b)
+        table = self._table
+        suffix_first = self._suffix_first
+
+        def first(p):
+            return suffix_first[p][0]
+
+        for nt, (start, stop) in table.ranges.items():
+            pairs = set()
+            for group in _lookahead_groups(start, stop, first):
+                pairs.update(combinations(group, 2))
+
+            for a, b in sorted(pairs):
+                yield (self.symbols.non_terminals[nt],
+                       table.decode(table.rhs[a]), table.decode(table.rhs[b]))
 
     def is_factored(self) -> bool:
         return not any(self.find_nondeterminisms())
 
-    def next_nonterminal_name(self, nt: NonTerminal) -> NonTerminal:
+    def ll1_conflicts(self) -> Iterator[Conflict]:
+        # Alternatives of a non-terminal that are predicted by the same
+        # lookahead: FIRST of the alternative, plus FOLLOW of the
+        # non-terminal when the alternative is nullable.
+        table = self._table
+        symbols = self.symbols
+        suffix_first = self._suffix_first
+        follow = self._follow_masks
+
+        def predict(p):
+            first = suffix_first[p][0]
+            if first & EPSILON_BIT:
+                first |= follow.get(table.lhs[p], 0)
+            return first & ~EPSILON_BIT
+
+        for nt, (start, stop) in table.ranges.items():
+            groups = _lookahead_groups(start, stop, predict)
+            for group, lookahead in groups.items():
+                yield Conflict(
+                    symbols.non_terminals[nt],
+                    symbols.terminal_set(lookahead),
+                    tuple(table.decode(table.rhs[p]) for p in group),
+                )
+
+    def is_ll1(self) -> bool:
+        return not any(self.ll1_conflicts())
+
+    @memoized
+    def build_ll1_table(self) -> LL1Table:
+        return LL1Table(self)
+
+    @memoized
+    def build_lalr_table(self) -> LALRTable:
+        return LALRTable(self)
+
+    @memoized
+    def build_earley_parser(self) -> EarleyParser:
+        return EarleyParser(self)
+
+    @memoized
+    def build_cyk_recognizer(self) -> CYKRecognizer:
+        return CYKRecognizer(self)
+
+    def next_nonterminal_name(
+        self,
+        nt: NonTerminal,
+        taken: Iterable[NonTerminal] = (),
+    ) -> NonTerminal:
         n = 1
-        while NonTerminal(f'{nt}{n}') in self.non_terminals:
+        while (NonTerminal(f'{nt}{n}') in self.non_terminals
+               or NonTerminal(f'{nt}{n}') in taken):
             n += 1
 
         return NonTerminal(f'{nt}{n}')
@@ -118,7 +306,7 @@ class ContextFreeGrammar:
         for i, symbol in enumerate(sentence):
             if isinstance(symbol, NonTerminal):
 
-                for prod in self.production_rules[symbol]:
+                for prod in self.production_rules.get(symbol, ()):
                     derivation = [
                         *sentence[:i],
                         *[s for s in prod if s != Epsilon('&')],
@@ -135,14 +323,48 @@ class ContextFreeGrammar:
         common = a[0]
         assert common == b[0]
 
-        self.production_rules[nt].remove(a)
-        self.production_rules[nt].remove(b)
+        table = self._table
+        a_codes, b_codes = table.encode(a), table.encode(b)
+        nt_id = table.id(nt)
 
-        new_nt = self.next_nonterminal_name(nt)
+        productions = list(table.encoded(nt_id))
+        productions.remove(a_codes)
+        productions.remove(b_codes)
 
-        self.production_rules[nt].append([common, new_nt])
-        self.production_rules[new_nt].append(a[1:])
-        self.production_rules[new_nt].append(b[1:])
+        new_nt = self.next_nonterminal_name(nt)
+        new_nt_id = self.symbols.intern(new_nt)
+
+        productions.append((a_codes[0], new_nt_id))
+        self._edit({
+            nt_id: productions,
+            new_nt_id: [a_codes[1:], b_codes[1:]],
+        })
+
+    def add_production(self, lhs: NonTerminal, rhs: List[Symbol]) -> None:
+        table = self._table
+        lhs_id = self.symbols.intern(lhs)
+        self._edit({lhs_id: [*table.encoded(lhs_id), table.encode(rhs)]})
+
+    def remove_production(self, lhs: NonTerminal, rhs: List[Symbol]) -> None:
+        table = self._table
+        lhs_id = table.id(lhs)
+        productions = list(table.encoded(lhs_id))
+        productions.remove(table.encode(rhs))
+        self._edit({lhs_id: productions})
+
+    def _edit(self, rows: Dict[int, List[Encoded]]) -> None:
+        # Like _set_table, but for local edits: the analyses computed so far
+        # are brought up to date instead of thrown away.
+        old = self._table
+        cache = self._cache
+
+        self._set_table(old.replace(rows))
+        for key in incremental.INCREMENTAL:
+            if key in cache:
+                self._cache[key] = cache[key]
+
+        incremental.update(self._cache, old, self._table, set(rows),
+                           old.id(self.start_symbol))
 
     def remove_indirect_non_determinism(
         self,
@@ -150,294 +372,949 @@ class ContextFreeGrammar:
         a: List[Symbol],
         b: List[Symbol],
     ):
-        ...
+        table = self._table
+        self._expand_leading(
+            {table.id(nt): {table.encode(a), table.encode(b)}})
+
+    def _expand_leading(self, alternatives: Dict[int, Set[Encoded]]) -> None:
+        # Replaces each of the given alternatives that starts with a
+        # non-terminal, B x, by every D x with B -> D, which turns
+        # conflicts between them into common prefixes.
+        table = self._table
+        rows = {}
+        for nt, expand in alternatives.items():
+            productions: Dict[Encoded, None] = {}
+            for rhs in table.encoded(nt):
+                if rhs in expand and rhs and rhs[0] >= 0:
+                    for other in table.encoded(rhs[0]):
+                        productions[other + rhs[1:]] = None
+                else:
+                    productions[rhs] = None
+            rows[nt] = list(productions)
+        self._edit(rows)
 
     def simple_production_sets(self) -> Dict[NonTerminal, Set[NonTerminal]]:
-        ns = {nt: {nt} for nt in self.production_rules}
-
-        for lhs, productions in self.production_rules.items():
-            for rhs in productions:
-                if len(rhs) == 1 and isinstance(rhs[0], NonTerminal):
-                    for nt in ns[rhs[0]]:
-                        ns[lhs].add(nt)
+        non_terminals = self.symbols.non_terminals
+        closure = self._unit_closure
+        return {
+            non_terminals[nt]: {
+                non_terminals[other] for other in bits(closure[nt])}
+            for nt in self._table.ranges
+        }
 
-                        for other_nt, other_set in ns.items():
-                            if lhs in other_set:
-                                other_set.add(nt)
-
-        return ns
+    @property
+    @memoized
+    def _unit_closure(self) -> Dict[int, int]:
+        # Bitmask of the non-terminals each one derives through unit
+        # productions alone, itself included: one solve_unions over the
+        # graph of unit productions.
+        table = self._table
+        units: Dict[int, List[int]] = {}
+        for lhs, rhs in zip(table.lhs, table.rhs):
+            if len(rhs) == 1 and rhs[0] >= 0 and rhs[0] in table.ranges:
+                units.setdefault(lhs, []).append(rhs[0])
+
+        return solve_unions(
+            table.ranges, {nt: 1 << nt for nt in table.ranges}, units, 0)
 
     def without_simple_productions(self) -> 'ContextFreeGrammar':
-        new_productions = []
+        table = self._table
+        closure = self._unit_closure
+        rows: Dict[int, List[Encoded]] = {}
+
+        for lhs in table.ranges:
+            lhs_rows = rows[lhs] = []
+            seen: Set[Encoded] = set()
+            for other in chain((lhs,), bits(closure[lhs] & ~(1 << lhs))):
+                for rhs in table.encoded(other):
+                    if (len(rhs) != 1 or rhs[0] < 0) and rhs not in seen:
+                        seen.add(rhs)
+                        lhs_rows.append(rhs)
+
+        return self._from_table(
+            ProductionTable(table.symbols, rows.items()), self.start_symbol)
+
+    def factor(self, max_steps, should_stop=None):
+        # Leaves the grammar as it is after the last step taken, which is
+        # the first factored one if any. See FactoringSearch.run for
+        # `should_stop`.
+        def compute():
+            last = self._factoring.run(max_steps, should_stop)[-1]
+            return last._table, last.is_factored()
+
+        table, factored = self._shared(
+            ('factor', max_steps, self._layout()), compute)
+        self._set_table(table)
+        return factored
+
+    def is_factorable(self, max_steps: int, should_stop=None) -> bool:
+        return self._shared(
+            ('factorable', max_steps),
+            lambda: self._factoring.run(
+                max_steps, should_stop)[-1].is_factored())
+
+    def factor_step(self) -> None:
+        # Left factors the grammar, and then expands the leading
+        # non-terminals of the alternatives that still conflict (all of
+        # them are indirect by then) and left factors what that gives.
+        self.left_factor()
+
+        table = self._table
+        alternatives: Dict[int, Set[Encoded]] = {}
+        for nt, a, b in self.find_nondeterminisms():
+            nt_id = table.id(nt)
+            alternatives.setdefault(nt_id, set()).update(
+                (table.encode(a), table.encode(b)))
+        if alternatives:
+            self._expand_leading(alternatives)
+            self.left_factor()
 
-        for lhs, other_nts in self.simple_production_sets().items():
-            for other_nt in other_nts:
-                for rhs in self.production_rules[other_nt]:
-                    if len(rhs) > 1 or not isinstance(rhs[0], NonTerminal):
-                        new_productions.append(ProductionRule(lhs, rhs))
-
-        return ContextFreeGrammar(new_productions, self.start_symbol)
+    @property
+    def _factoring(self) -> FactoringSearch:
+        # Memoized under a lock: tasks asking for it at once must still get
+        # the same search, which serializes their runs.
+        with _factoring_lock:
+            try:
+                return self._cache['_factoring']
+            except KeyError:
+                search = self._cache['_factoring'] = FactoringSearch(self)
+                return search
 
-    def factor(self, max_steps):
-        for _ in range(max_steps):
-            if self.is_factored():
-                return True
+    @property
+    def _canonical(self) -> Tuple:
+        return self._canonical_numbering[1]
 
-            for nt, a, b in self.find_nondeterminisms():
-                if a[0] == b[0]:
-                    self.remove_direct_non_determinism(nt, a, b)
-                else:
-                    self.remove_indirect_non_determinism(nt, a, b)
+    @property
+    @memoized
+    def _canonical_numbering(self) -> Tuple[List[int], Tuple]:
+        # The productions with non-terminals numbered in the order they are
+        # found from the start symbol, and each one's alternatives sorted,
+        # so grammars that only differ in names or in the order of their
+        # alternatives look the same. Terminals are kept as strings.
+        table = self._table
+        terminals = self.symbols.terminals
+        numbers: Dict[int, int] = {}
+        order: List[int] = []
+
+        def number(nt):
+            if nt not in numbers:
+                numbers[nt] = len(order)
+                order.append(nt)
+
+        # Ties between non-terminals that haven't been numbered yet are
+        # broken by the shape of their productions, which doesn't depend on
+        # names either.
+        shapes = {
+            nt: sorted(tuple('' if code >= 0 else terminals[~code].value
+                             for code in rhs)
+                       for rhs in table.encoded(nt))
+            for nt in table.ranges
+        }
+
+        def key(rhs):
+            return tuple(
+                (2, terminals[~code].value, []) if code < 0
+                else (0, numbers[code], []) if code in numbers
+                else (1, 0, shapes.get(code, []))
+                for code in rhs
+            )
 
-        return self.is_factored()
+        number(table.id(self.start_symbol))
+        # The non-terminals that can't be reached from the start go last.
+        unreachable = iter(sorted(table.ranges, key=shapes.get))
+        rows = []
+        i = 0
+        while True:
+            if i == len(order):
+                rest = (nt for nt in unreachable if nt not in numbers)
+                nt = next(rest, None)
+                if nt is None:
+                    break
+                number(nt)
 
-    def to_epsilon_free(self):
-        ne: Set['NonTerminal'] = {nt for nt in self.non_terminals if [
-            EPSILON] in self.production_rules[nt]}
+            productions = sorted(table.encoded(order[i]), key=key)
+            for rhs in productions:
+                for code in rhs:
+                    if code >= 0:
+                        number(code)
+            rows.append(tuple(
+                tuple(numbers[code] if code >= 0 else terminals[~code].value
+                      for code in rhs)
+                for rhs in sorted(productions, key=key)
+            ))
+            i += 1
+
+        return order, tuple(rows)
+
+    @memoized
+    def _layout(self) -> str:
+        # Transformations keep the names and the order of the productions
+        # they are given, so their results are also keyed by this, which
+        # tells apart grammars with the same fingerprint.
+        text = f'{self.start_symbol}\n{self}'
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _shared(self, key: Tuple, compute) -> Any:
+        # Looks the analysis up in the cache shared by every grammar, which
+        # is keyed by fingerprint, so `compute` must give a result that
+        # holds for any grammar with the same fingerprint.
+        key = (self.fingerprint(), *key)
+        value = analyses.get(key)
+        if value is None:
+            value = compute()
+            analyses.put(key, value)
+        return value
+
+    def _shared_masks(self, name: str, calculate) -> Dict[int, int]:
+        # FIRST and FOLLOW are shared as the terminals of each canonical
+        # non-terminal number, and translated back to this grammar's IDs.
+        key = (self.fingerprint(), name)
+        order = self._canonical_numbering[0]
+        symbols = self.symbols
+
+        shared = analyses.get(key)
+        if shared is not None:
+            ranges = self._table.ranges
+            return {
+                nt: symbols.terminal_mask(terminals)
+                for nt, terminals in zip(order, shared)
+                if nt in ranges
+            }
+
+        calculate()
+        masks = self._cache[f'_{name}_masks']
+        analyses.put(key, tuple(
+            frozenset(symbols.terminal_set(masks.get(nt, 0))) for nt in order))
+        return masks
+
+    @memoized
+    def fingerprint(self) -> str:
+        return hashlib.sha256(repr(self._canonical).encode()).hexdigest()
+
+    def canonical_form(self) -> 'ContextFreeGrammar':
+        # The grammar as `_canonical` sees it, with the non-terminals renamed
+        # S, A1, A2... in the order they are numbered.
+        names = [NonTerminal(f'A{i}' if i else 'S')
+                 for i in range(len(self._canonical))]
+        return ContextFreeGrammar([
+            ProductionRule(names[i], [
+                names[s] if isinstance(s, int) else Terminal(s) for s in rhs
+            ])
+            for i, row in enumerate(self._canonical)
+            for rhs in row
+        ], names[0])
+
+    def left_factor(self) -> None:
+        # Puts the alternatives of each non-terminal in a prefix trie, and
+        # gives every node where they branch a new non-terminal, so the
+        # longest common prefixes of all of them are factored out at once.
+        table = self._table
+        symbols = self.symbols
+        taken: Set[NonTerminal] = set()
+        rows: Dict[int, List[Encoded]] = {}
+
+        def expand(nt, node):
+            productions = []
+            for code, child in node.children.items():
+                if code is None:
+                    productions.append(())
+                    continue
+
+                prefix = [code]
+                while len(child.children) == 1 and None not in child.children:
+                    code, child = next(iter(child.children.items()))
+                    prefix.append(code)
+
+                if len(child.children) > 1:
+                    new_nt = self.next_nonterminal_name(
+                        symbols.non_terminals[nt], taken)
+                    taken.add(new_nt)
+                    new_id = symbols.intern(new_nt)
+                    # Taking its place first keeps the new non-terminals
+                    # in the order they are named.
+                    rows[new_id] = []
+                    rows[new_id] = expand(nt, child)
+                    prefix.append(new_id)
+                productions.append(tuple(prefix))
+            return productions
+
+        for nt in table.ranges:
+            productions = table.encoded(nt)
+            root = _TrieNode()
+            for rhs in productions:
+                root.insert(rhs)
+
+            factored = expand(nt, root)
+            if tuple(factored) != productions:
+                rows[nt] = factored
+
+        if rows:
+            self._edit(rows)
+
+    def left_recursions(self) -> List[LeftRecursion]:
+        # A is left recursive iff it is in FIRST-NT(A), that is, iff it is
+        # in a cycle of the graph FIRST-NT is the closure of. Each strongly
+        # connected component of that graph with more than one member is an
+        # indirect recursion, and each A -> xAy with x =>* & a direct one.
+        non_terminals = self.symbols.non_terminals
+        corners = self._left_corners
+
+        recursions = []
+        for members in self._left_recursive_components():
+            for nt in members:
+                if nt in corners[nt]:
+                    recursions.append(
+                        LeftRecursion('direct', (non_terminals[nt],)))
+            if len(members) > 1:
+                recursions.append(LeftRecursion(
+                    'indirect', tuple(non_terminals[nt] for nt in members)))
+
+        return recursions
+
+    def has_left_recursion(self) -> bool:
+        return bool(self._left_recursive_components())
 
-        while True:
-            new_ne = ne.copy()
-
-            for lhs, rhs in self.production_rules.items():
-                for prod in rhs:
-                    if set(prod).issubset(new_ne):
-                        new_ne.add(lhs)
-
-            if ne == new_ne:
-                break
-            ne = new_ne
-
-        new_productions: List['ProductionRule'] = [ProductionRule(lhs, rhs)
-                                                   for lhs, prods in self.production_rules.items()
-                                                   for rhs in prods
-                                                   if rhs != [EPSILON]]
-
-        for lhs, prods in self.production_rules.items():
-            for rhs in prods:
-                if set(rhs).intersection(set(ne)) != set():
-                    idxs = [i
-                            for i, x in enumerate(rhs)
-                            if x in ne]
-                    for subset in powerset(idxs):
-                        if not subset:
-                            continue
-                        new_rhs = [s
-                                   for i, s in enumerate(rhs)
-                                   if i not in subset]
-                        if not new_rhs:
-                            continue
-                        new_productions.append(ProductionRule(lhs, new_rhs))
-
-        if self.start_symbol in ne:
-            new_start = self.next_nonterminal_name(self.start_symbol)
-            prods = [[self.start_symbol], [EPSILON]]
-            new_productions += [ProductionRule(new_start, rhs)
-                                for rhs in prods]
-
-            return ContextFreeGrammar(new_productions, new_start), ne
-
-        return ContextFreeGrammar(new_productions, self.start_symbol), ne
+    @property
+    @memoized
+    def _left_corners(self) -> Dict[int, Set[int]]:
+        # A -> B when some production A -> xBy has x =>* &.
+        table = self._table
+        nullable = self._nullable_ids
+        corners: Dict[int, Set[int]] = {nt: set() for nt in table.ranges}
+        for lhs, rhs in zip(table.lhs, table.rhs):
+            for code in rhs:
+                if code < 0:
+                    break
+                corners[lhs].add(code)
+                if code not in nullable:
+                    break
+        return corners
+
+    @memoized
+    def _left_recursive_components(self) -> List[List[int]]:
+        # In the order of the grammar, and so are their members.
+        corners = self._left_corners
+        order = {nt: i for i, nt in enumerate(self._table.ranges)}
+        components = [
+            sorted(members, key=order.get)
+            for members in strongly_connected_components(order, corners)
+            if len(members) > 1 or members[0] in corners.get(members[0], ())
+        ]
+        components.sort(key=lambda members: order[members[0]])
+        return components
+
+    def remove_left_recursion(self) -> 'ContextFreeGrammar':
+        # The usual ordering algorithm: within each recursive component,
+        # productions of A_i starting with an earlier A_j are expanded with
+        # those of A_j, and then the direct recursion of A_i is replaced by
+        # right recursion on a new non-terminal. Expanding only inside a
+        # component keeps the substitutions from spreading over the grammar.
+        #
+        # It needs a grammar without & productions and cycles, so one that
+        # has them (where it matters) is made &-free and cycle-free first.
+        g = self
+        if g._has_hidden_left_recursion():
+            g, _ = g.to_epsilon_free()
+            g = g.without_simple_productions()
+
+        table = g._table
+        symbols = table.symbols
+        rows = {lhs: list(table.encoded(lhs)) for lhs in table.ranges}
+        primes: Dict[int, int] = {}
+        taken: Set[NonTerminal] = set()
+
+        for members in g._left_recursive_components():
+            for i, nt in enumerate(members):
+                for earlier in members[:i]:
+                    expanded: List[Encoded] = []
+                    for rhs in rows[nt]:
+                        if rhs and rhs[0] == earlier:
+                            expanded.extend(
+                                other + rhs[1:] for other in rows[earlier])
+                        else:
+                            expanded.append(rhs)
+                    rows[nt] = list(dict.fromkeys(expanded))
+
+                # A -> A adds nothing to the language, and is dropped.
+                recursive = [rhs[1:] for rhs in rows[nt]
+                             if rhs[:1] == (nt,) and len(rhs) > 1]
+                if not recursive:
+                    rows[nt] = [rhs for rhs in rows[nt] if rhs != (nt,)]
+                    continue
+
+                prime = g.next_nonterminal_name(
+                    symbols.non_terminals[nt], taken)
+                taken.add(prime)
+                primes[nt] = symbols.intern(prime)
+                rows[nt] = [rhs + (primes[nt],)
+                            for rhs in rows[nt] if rhs[:1] != (nt,)]
+                rows[primes[nt]] = [
+                    rhs + (primes[nt],) for rhs in recursive] + [()]
+
+        ordered = []
+        for nt in table.ranges:
+            ordered.append((nt, rows[nt]))
+            if nt in primes:
+                ordered.append((primes[nt], rows[primes[nt]]))
+
+        return self._from_table(
+            ProductionTable(symbols, ordered), g.start_symbol)
+
+    def _has_hidden_left_recursion(self) -> bool:
+        # Whether a recursive component has nullable symbols or cycles of
+        # unit productions, either of which can hide left recursion from the
+        # ordering algorithm (or make it create some).
+        table = self._table
+        nullable = self._nullable_ids
+        closure = self._unit_closure
+        for members in self._left_recursive_components():
+            for nt in members:
+                if nt in nullable:
+                    return True
+                if any(closure[other] >> nt & 1
+                       for other in bits(closure[nt] & ~(1 << nt))):
+                    return True
+                if any(code in nullable
+                       for rhs in table.encoded(nt) for code in rhs):
+                    return True
+        return False
+
+    def to_epsilon_free(self, binarize: bool = False):
+        g, ne = self._shared(('epsilon_free', binarize, self._layout()),
+                             lambda: self._to_epsilon_free(binarize))
+        return g.copy(), set(ne)
+
+    def _to_epsilon_free(self, binarize: bool):
+        # With `binarize`, productions with more than two nullable symbols
+        # are first split into chains of two-symbol productions, so that
+        # each of them gives at most three new productions instead of 2^n.
+        g = self._binarize_nullable() if binarize else self
+        table = g._table
+        ne = g._nullable_ids
+
+        rows: Dict[int, List[Encoded]] = {lhs: [] for lhs in table.ranges}
+        seen: Dict[int, Set[Encoded]] = {lhs: set() for lhs in table.ranges}
+
+        def add(lhs, rhs):
+            if rhs and rhs not in seen[lhs]:
+                seen[lhs].add(rhs)
+                rows[lhs].append(rhs)
+
+        for lhs, rhs in zip(table.lhs, table.rhs):
+            add(lhs, rhs)
+
+        for lhs, rhs in zip(table.lhs, table.rhs):
+            idxs = [i
+                    for i, x in enumerate(rhs)
+                    if x in ne]
+            for subset in powerset(idxs):
+                if not subset:
+                    continue
+                add(lhs, tuple(s
+                               for i, s in enumerate(rhs)
+                               if i not in subset))
+
+        ne_symbols = {self.symbols.non_terminals[nt]
+                      for nt in self._nullable_ids}
+        start_symbol = self.start_symbol
+
+        if table.id(start_symbol) in ne:
+            start_symbol = g.next_nonterminal_name(self.start_symbol)
+            rows[self.symbols.intern(start_symbol)] = [
+                (table.id(self.start_symbol),), ()]
+
+        new_table = ProductionTable(table.symbols, rows.items())
+        return self._from_table(new_table, start_symbol), ne_symbols
+
+    def _binarize_nullable(self) -> 'ContextFreeGrammar':
+        table = self._table
+        ne = self._nullable_ids
+        fresh = self._fresh_names()
+
+        rows: Dict[int, List[Encoded]] = {lhs: [] for lhs in table.ranges}
+        suffixes: Dict[Encoded, int] = {}
+
+        for lhs, rhs in zip(table.lhs, table.rhs):
+            if sum(1 for code in rhs if code in ne) > 2:
+                _binarize(lhs, rhs, rows, suffixes,
+                          fresh, table.symbols.non_terminals[lhs])
+            else:
+                rows[lhs].append(rhs)
+
+        return self._from_table(
+            ProductionTable(table.symbols, rows.items()), self.start_symbol)
+
+    def _fresh_names(self):
+        # Makes up non-terminals named after a given one, which clash
+        # neither with the grammar's nor with each other.
+        taken = set(self.non_terminals)
+        symbols = self.symbols
+
+        def fresh(base: NonTerminal) -> int:
+            n = 1
+            while NonTerminal(f'{base}{n}') in taken:
+                n += 1
+            nt = NonTerminal(f'{base}{n}')
+            taken.add(nt)
+            return symbols.intern(nt)
+
+        return fresh
+
+    def to_cnf(self) -> 'ContextFreeGrammar':
+        g, _ = self.to_epsilon_free(binarize=True)
+        g = g.without_simple_productions().remove_useless()
+
+        table = g._table
+        symbols = table.symbols
+        fresh = g._fresh_names()
+
+        rows: Dict[int, List[Encoded]] = {
+            lhs: [] for lhs in table.ranges
+        }
+        # One non-terminal per terminal that needs replacing, and one per
+        # distinct suffix of a long right-hand side, so the result stays
+        # linear in the size of the grammar.
+        wrappers: Dict[int, int] = {}
+        suffixes: Dict[Encoded, int] = {}
+
+        def wrap(code):
+            if code >= 0:
+                return code
+            if code not in wrappers:
+                wrappers[code] = fresh(NonTerminal('T'))
+                rows[wrappers[code]] = [(code,)]
+            return wrappers[code]
+
+        for lhs, rhs in zip(table.lhs, table.rhs):
+            if len(rhs) < 2:
+                rows[lhs].append(rhs)
+            else:
+                _binarize(lhs, tuple(wrap(code) for code in rhs), rows,
+                          suffixes, fresh, symbols.non_terminals[lhs])
+
+        return self._from_table(
+            ProductionTable(symbols, rows.items()), g.start_symbol)
 
     def remove_unreachable(self):
-        # Reachable symbols
-        reachable: Set['Symbol'] = {self.start_symbol}
+        table = self._table
+        reachable = self._reachable_codes
 
-        while True:
-            new_reachable = reachable.copy()
+        new_table = ProductionTable(table.symbols, (
+            (lhs, table.rhs[start:stop])
+            for lhs, (start, stop) in table.ranges.items()
+            if lhs in reachable
+        ))
 
-            for nt, rhs in self.production_rules.items():
-                if nt in new_reachable:
-                    for prod in rhs:
-                        for symbol in prod:
-                            new_reachable.add(symbol)
+        return self._from_table(new_table, self.start_symbol), self.reachable
 
-            if reachable == new_reachable:
-                break
-            reachable = new_reachable
+    @property
+    @memoized
+    def reachable(self) -> FrozenSet[Symbol]:
+        return frozenset(
+            self.symbols.decode(code) for code in self._reachable_codes)
 
-            new_productions = [
-                ProductionRule(lhs, rhs)
-                for lhs, prods in self.production_rules.items()
-                for rhs in prods
-                if lhs in reachable
-            ]
+    @property
+    @memoized
+    def _users(self) -> Dict[int, Dict[int, int]]:
+        return incremental.build_users(self._table)
 
-        return ContextFreeGrammar(new_productions, self.start_symbol), reachable
+    @property
+    @memoized
+    def _reachable_codes(self) -> Set[int]:
+        table = self._table
+        start = table.id(self.start_symbol)
+
+        reachable = {start}
+        worklist = [start]
+        while worklist:
+            nt = worklist.pop()
+            for rhs in table.encoded(nt):
+                for code in rhs or (~SymbolTable.EPSILON_ID,):
+                    if code not in reachable:
+                        reachable.add(code)
+                        if code >= 0:
+                            worklist.append(code)
+
+        return reachable
+
+    def to_proper(self) -> 'ContextFreeGrammar':
+        def compute():
+            g, _ = self.to_epsilon_free()
+            return g.without_simple_productions().remove_useless()
+
+        return self._shared(('proper', self._layout()), compute).copy()
 
     def remove_useless(self) -> 'ContextFreeGrammar':
-        return self.remove_infertile().remove_unreachable()
+        def compute():
+            g, _ = self.remove_infertile()
+            g, _ = g.remove_unreachable()
+            return g
 
-    def remove_infertile(self):
-        if self.is_empty():
-            s = NonTerminal('S')
-            return ContextFreeGrammar([ProductionRule(s, [s])], s)
+        return self._shared(('useless', self._layout()), compute).copy()
 
-        fertile = self.fertile()
+    def remove_infertile(self):
+        fertile = self.fertile
 
-        new_productions = []
-        for lhs, rhs in self.production_rules.items():
-            for prod in rhs:
-                if set(prod).issubset(fertile | self.terminals | {EPSILON}):
-                    new_productions.append(ProductionRule(lhs, prod))
+        if self.start_symbol not in fertile:
+            s = NonTerminal('S')
+            return ContextFreeGrammar([ProductionRule(s, [s])], s), fertile
 
-        return ContextFreeGrammar(new_productions, self.start_symbol), fertile
+        table = self._table
+        fertile_ids = self._fertile_ids
 
-    def fertile(self) -> Set['NonTerminal']:
-        fertile: Set['NonTerminal'] = set()
-        while True:
-            new_fertile = fertile.copy()
+        new_table = ProductionTable(table.symbols, (
+            (lhs, [rhs for rhs in table.rhs[start:stop]
+                   if all(code < 0 or code in fertile_ids for code in rhs)])
+            for lhs, (start, stop) in table.ranges.items()
+        ))
 
-            for nt, rhs in self.production_rules.items():
-                for prod in rhs:
-                    if set(prod).issubset(self.terminals | {EPSILON} | fertile):
-                        new_fertile.add(nt)
+        return self._from_table(new_table, self.start_symbol), fertile
 
-            if fertile == new_fertile:
-                break
-            fertile = new_fertile
+    @property
+    @memoized
+    def fertile(self) -> FrozenSet['NonTerminal']:
+        return frozenset(
+            self.symbols.non_terminals[nt] for nt in self._fertile_ids)
 
-        return new_fertile
+    @property
+    @memoized
+    def _fertile_ids(self) -> Set[int]:
+        # Same worklist as for nullable, except that terminals count as
+        # already derived, so a production only waits on its non-terminals.
+        table = self._table
+        occurrences = self._occurrences
+        pending = [sum(1 for code in rhs if code >= 0) for rhs in table.rhs]
+        worklist = [table.lhs[p] for p, n in enumerate(pending) if n == 0]
+
+        fertile: Set[int] = set()
+        while worklist:
+            nt = worklist.pop()
+            if nt in fertile:
+                continue
+            fertile.add(nt)
+
+            for p in occurrences.get(nt, ()):
+                pending[p] -= 1
+                if pending[p] == 0:
+                    worklist.append(table.lhs[p])
+
+        return fertile
 
     def is_empty(self):
-        return self.start_symbol not in self.fertile()
+        return self._shared(
+            ('empty',), lambda: self.start_symbol not in self.fertile)
+
+    @memoized
+    def is_infinite(self) -> bool:
+        # The language is infinite iff some useful A derives u A v with uv
+        # not empty, that is, iff some cycle of the dependency graph of the
+        # useful non-terminals goes through an occurrence whose siblings
+        # can derive a terminal.
+        if self.is_empty():
+            return False
+
+        g = self.remove_useless()
+        table = g._table
+        solid = g._solid_ids
+
+        edges: Dict[int, List[int]] = {}
+        growing = []
+        for lhs, rhs in zip(table.lhs, table.rhs):
+            weight = sum(1 for code in rhs if code < 0 or code in solid)
+            for code in rhs:
+                if code >= 0:
+                    edges.setdefault(lhs, []).append(code)
+                    if weight - (code in solid) > 0:
+                        growing.append((lhs, code))
+
+        component = {}
+        for i, members in enumerate(
+                strongly_connected_components(table.ranges, edges)):
+            for nt in members:
+                component[nt] = i
+
+        return any(component[a] == component[b] for a, b in growing)
+
+    @memoized
+    def language_size_class(self) -> LanguageSize:
+        if self.is_empty():
+            return LanguageSize('empty', 0, 0)
+        if self.is_infinite():
+            return LanguageSize('infinite', None, None)
+
+        # Once it has no & or unit productions (and no useless symbols),
+        # the grammar of a finite language has no cycles at all, and its
+        # derivations can be counted bottom-up, one non-terminal at a time.
+        g, _ = self.to_epsilon_free(binarize=True)
+        g = g.without_simple_productions().remove_useless()
+        table = g._table
+        start = table.id(g.start_symbol)
+
+        edges = {lhs: {code for rhs in table.encoded(lhs)
+                       for code in rhs if code >= 0}
+                 for lhs in table.ranges}
+        order = [nt for members in strongly_connected_components(
+                     table.ranges, edges) for nt in members]
+
+        count: Dict[int, int] = {}
+        for nt in order:
+            total = 0
+            for rhs in table.encoded(nt):
+                product = 1
+                for code in rhs:
+                    if code >= 0:
+                        product *= count[code]
+                total += product
+            count[nt] = total
+        derivations = count[start]
+
+        # Each sentence of an unambiguous grammar has a single derivation,
+        # and LL(1) grammars are unambiguous, as are the grammars above
+        # when made from one (removing &, unit productions and useless
+        # symbols keeps them so). Otherwise, the sentences are listed, in
+        # the same order, if there aren't too many of them.
+        if self.is_ll1() or g.is_ll1():
+            return LanguageSize('finite', derivations, derivations)
+        if derivations > SENTENCE_LIMIT:
+            return LanguageSize('finite', None, derivations)
+
+        sentences: Dict[int, Set[Tuple[int, ...]]] = {}
+        for nt in order:
+            words: Set[Tuple[int, ...]] = set()
+            for rhs in table.encoded(nt):
+                prefixes: Set[Tuple[int, ...]] = {()}
+                for code in rhs:
+                    parts = sentences[code] if code >= 0 else {(code,)}
+                    prefixes = {p + w for p in prefixes for w in parts}
+                words |= prefixes
+            sentences[nt] = words
+
+        return LanguageSize('finite', len(sentences[start]), derivations)
 
-    def first_of_string(self, string):
-        first = set()
+    @property
+    @memoized
+    def _solid_ids(self) -> Set[int]:
+        # Non-terminals that derive at least one non-empty sentence, as
+        # long as the grammar has no useless symbols.
+        table = self._table
+        occurrences = self._occurrences
+        worklist = [lhs for lhs, rhs in zip(table.lhs, table.rhs)
+                    if any(code < 0 for code in rhs)]
+
+        solid: Set[int] = set()
+        while worklist:
+            nt = worklist.pop()
+            if nt in solid:
+                continue
+            solid.add(nt)
+            for p in occurrences.get(nt, ()):
+                worklist.append(table.lhs[p])
+
+        return solid
 
-        for i, symbol in enumerate(string):
-            if isinstance(symbol, NonTerminal):
-                first = first.union(self.first[symbol] - set([EPSILON]))
-                if EPSILON not in self.first[symbol]:
-                    break
-            elif isinstance(symbol, Terminal):
-                first.add(symbol)
-                break
-        else:
-            first.add(EPSILON)
+    def first_of_string(self, string):
+        codes = self._table.encode(string)
+        return self.symbols.terminal_set(self._first_of_codes(codes))
 
-        return first
+    def _first_of_codes(self, codes) -> int:
+        first = 0
+        first_masks = self._first_masks
 
-    def calculate_first_nt(self):
-        self.first_nt.clear()
-        first_nt = {nt: set() for nt in self.non_terminals}
+        for code in codes:
+            if code >= 0:
+                symbol_first = first_masks.get(code, 0)
+                first |= symbol_first & ~EPSILON_BIT
+                if not symbol_first & EPSILON_BIT:
+                    return first
+            else:
+                return first | 1 << ~code
 
-        for nt in self.non_terminals:
-            for production in self.production_rules[nt]:
-                first_symbol = production[0]
-                if (isinstance(first_symbol, NonTerminal) or
-                        isinstance(first_symbol, Epsilon)):
-                    first_nt[nt].add(first_symbol)
+        return first | EPSILON_BIT
 
-        while True:
-            new_first = first_nt.copy()
-
-            for nt in self.non_terminals:
-                for production in self.production_rules[nt]:
-                    for symbol in production:
-                        if isinstance(symbol, NonTerminal):
-                            if EPSILON in new_first[symbol]:
-                                new_first[nt] = new_first[nt].union(
-                                    new_first[symbol] -
-                                    {EPSILON} |
-                                    {symbol})
-                            else:
-                                new_first[nt] = new_first[nt].union(
-                                    new_first[symbol] | {symbol})
-                                break
-                        elif isinstance(symbol, Terminal):
-                            break
+    @property
+    @memoized
+    def _suffix_first(self) -> Tuple[Tuple[int, ...], ...]:
+        # _suffix_first[p][i] = FIRST(table.rhs[p][i:]), with & in it when
+        # that suffix is nullable. Each row is built right-to-left in one
+        # pass, and rows are shared by identical right-hand sides.
+        first = self._first_masks
+        rows: Dict[Encoded, Tuple[int, ...]] = {}
+
+        for rhs in set(self._table.rhs):
+            suffix_first = EPSILON_BIT
+            row = [suffix_first]
+            for code in reversed(rhs):
+                if code < 0:
+                    suffix_first = 1 << ~code
+                else:
+                    symbol_first = first.get(code, 0)
+                    if symbol_first & EPSILON_BIT:
+                        suffix_first |= symbol_first & ~EPSILON_BIT
                     else:
-                        new_first[nt].add(EPSILON)
+                        suffix_first = symbol_first
+                row.append(suffix_first)
+            row.reverse()
+            rows[rhs] = tuple(row)
 
-            if new_first == first_nt:
-                break
-            first_nt = new_first
+        return tuple(rows[rhs] for rhs in self._table.rhs)
 
-        self.first_nt = first_nt
+    @property
+    @memoized
+    def nullable(self) -> FrozenSet['NonTerminal']:
+        return frozenset(
+            self.symbols.non_terminals[nt] for nt in self._nullable_ids)
 
-    def calculate_first(self):
-        self.first.clear()
-        first = {nt: set() for nt in self.non_terminals}
+    @property
+    @memoized
+    def _occurrences(self) -> Dict[int, List[int]]:
+        # Reverse index: non-terminal -> the productions it appears in, once
+        # per occurrence, so the worklists below can count them down.
+        occurrences: Dict[int, List[int]] = {}
+        for p, rhs in enumerate(self._table.rhs):
+            for code in rhs:
+                if code >= 0:
+                    occurrences.setdefault(code, []).append(p)
+        return occurrences
 
-        for nt in self.non_terminals:
-            for production in self.production_rules[nt]:
-                first_symbol = production[0]
-                if (isinstance(first_symbol, Terminal) or
-                        isinstance(first_symbol, Epsilon)):
-                    first[nt].add(first_symbol)
+    @property
+    @memoized
+    def _nullable_ids(self) -> Set[int]:
+        # Counter-based worklist: a production becomes nullable once all of
+        # its symbols are known to be nullable.
+        table = self._table
+        occurrences = self._occurrences
+        pending = [len(rhs) for rhs in table.rhs]
+        worklist = [table.lhs[p] for p, n in enumerate(pending) if n == 0]
+
+        nullable: Set[int] = set()
+        while worklist:
+            nt = worklist.pop()
+            if nt in nullable:
+                continue
+            nullable.add(nt)
+
+            for p in occurrences.get(nt, ()):
+                pending[p] -= 1
+                if pending[p] == 0:
+                    worklist.append(table.lhs[p])
+
+        return nullable
 
-        while True:
-            new_first = first.copy()
-
-            for nt in self.non_terminals:
-                for production in self.production_rules[nt]:
-                    for symbol in production:
-                        if isinstance(symbol, NonTerminal):
-                            if EPSILON in new_first[symbol]:
-                                new_first[nt] = new_first[nt].union(
-                                    new_first[symbol] - {EPSILON})
-                            else:
-                                new_first[nt] |= new_first[symbol]
-                                break
-                        elif isinstance(symbol, Terminal):
-                            new_first[nt].add(symbol)
-                            break
-                    else:
-                        new_first[nt].add(EPSILON)
+    @property
+    @memoized
+    def first(self) -> 'Mapping[NonTerminal, FrozenSet[Symbol]]':
+        return MappingProxyType(
+            self._decode(self._first_masks, self.symbols.terminal_set))
+
+    @property
+    @memoized
+    def follow(self) -> 'Mapping[NonTerminal, FrozenSet[Symbol]]':
+        return MappingProxyType(
+            self._decode(self._follow_masks, self.symbols.terminal_set))
 
-            if new_first == first:
-                break
-            first = new_first
+    @property
+    @memoized
+    def first_nt(self) -> 'Mapping[NonTerminal, FrozenSet[Symbol]]':
+        first_nt = self._decode(
+            self._first_nt_masks, self.symbols.non_terminal_set)
+        for id in self._nullable_ids:
+            nt = self.symbols.non_terminals[id]
+            first_nt[nt] = first_nt[nt] | {EPSILON}
+        return MappingProxyType(first_nt)
+
+    def _decode(self, masks: Dict[int, int],
+                to_set) -> Dict[NonTerminal, FrozenSet[Symbol]]:
+        # Copies of the grammar share these, so they can't be changed.
+        non_terminals = self.symbols.non_terminals
+        return {
+            non_terminals[nt]: frozenset(to_set(masks.get(nt, 0)))
+            for nt in self._table.ranges
+        }
 
-        self.first = first
+    @property
+    @memoized
+    def _first_masks(self) -> Dict[int, int]:
+        return self._shared_masks('first', self.calculate_first)
 
-    def calculate_follow(self):
-        self.calculate_first()
+    @property
+    @memoized
+    def _follow_masks(self) -> Dict[int, int]:
+        return self._shared_masks('follow', self.calculate_follow)
 
-        self.follow.clear()
-        follow = {nt: set() for nt in self.non_terminals}
+    @property
+    @memoized
+    def _first_nt_masks(self) -> Dict[int, int]:
+        self.calculate_first_nt()
+        return self._cache['_first_nt_masks']
 
-        for nt in self.non_terminals:
-            for production in self.production_rules[nt]:
-                # FOLLOW(A) = {t | B -> xAty is a production}
-                for i in range(0, len(production) - 1):
-                    symbol = production[i]
-                    next_symbol = production[i+1]
+    def calculate_first_nt(self):
+        table = self._table
+        nullable = self._nullable_ids
+        base = dict.fromkeys(table.ranges, 0)
+        deps = {nt: set() for nt in table.ranges}
+
+        # FIRST-NT(A) contains every B that can start a sentential form
+        # derived from A, and everything in FIRST-NT(B) (minus &).
+        for nt, rhs in zip(table.lhs, table.rhs):
+            for code in rhs:
+                if code < 0:
+                    break
+                base[nt] |= 1 << code
+                deps[nt].add(code)
+                if code not in nullable:
+                    break
 
-                    if (isinstance(symbol, NonTerminal) and
-                            isinstance(next_symbol, Terminal)):
-                        follow[symbol].add(next_symbol)
+        self._cache.pop('first_nt', None)
+        self._cache['_first_nt_masks'] = solve_unions(
+            table.ranges, base, deps, 0)
 
-        follow[self.start_symbol].add(EoS('$'))
+    def calculate_first(self):
+        table = self._table
+        nullable = self._nullable_ids
+        base = dict.fromkeys(table.ranges, 0)
+        deps = {nt: set() for nt in table.ranges}
+
+        # FIRST(A) = {t | A -> xty, x =>* &} U FIRST(B) - {&} for every
+        # A -> xBy with x =>* &
+        for nt, rhs in zip(table.lhs, table.rhs):
+            for code in rhs:
+                if code < 0:
+                    base[nt] |= 1 << ~code
+                    break
+                deps[nt].add(code)
+                if code not in nullable:
+                    break
 
-        while True:
-            new_follow = follow.copy()
-            for nt in self.non_terminals:
-                for production in self.production_rules[nt]:
-                    for i in range(0, len(production) - 1):
-                        symbol = production[i]
-                        next_symbol = production[i+1]
-
-                        # if B -> xAy is a production
-                        #   FOLLOW(A) = FOLLOW(A) U FIRST(y) - {&}
-                        if (isinstance(symbol, NonTerminal) and
-                                isinstance(next_symbol, NonTerminal)):
-                            new_follow[symbol] = new_follow[symbol].union(self.first_of_string(
-                                production[i+1:]) - {EPSILON})
-
-                            # if B -> xAy is a production and & in FIRST(y)
-                            #   FOLLOW(A) = FOLLOW(A) U FOLLOW(B)
-                            if EPSILON in self.first_of_string(production[i+1:]):
-                                new_follow[symbol] = new_follow[symbol].union(
-                                    new_follow[nt])
-
-                    last_symbol = production[len(production) - 1]
-                    if isinstance(last_symbol, NonTerminal):
-                        new_follow[last_symbol] = new_follow[last_symbol].union(
-                            new_follow[nt])
-
-            if new_follow == follow:
-                break
-            follow = new_follow
-
-        self.follow = follow
+        first = solve_unions(table.ranges, base, deps, 0)
+        for nt in nullable:
+            first[nt] |= EPSILON_BIT
+
+        self._cache.pop('first', None)
+        self._cache['_first_masks'] = first
+
+    def calculate_follow(self):
+        table = self._table
+        suffix_first = self._suffix_first
+        base = dict.fromkeys(table.ranges, 0)
+        deps = {nt: set() for nt in table.ranges}
+
+        base[table.id(self.start_symbol)] = EOS_BIT
+
+        for p, (nt, rhs) in enumerate(zip(table.lhs, table.rhs)):
+            for i, code in enumerate(rhs):
+                if code < 0:
+                    continue
+                rest = suffix_first[p][i + 1]
+
+                # if B -> xAy is a production
+                #   FOLLOW(A) = FOLLOW(A) U FIRST(y) - {&}
+                base[code] = base.get(code, 0) | rest & ~EPSILON_BIT
+
+                # if B -> xAy is a production and & in FIRST(y)
+                #   FOLLOW(A) = FOLLOW(A) U FOLLOW(B)
+                if rest & EPSILON_BIT:
+                    deps.setdefault(code, set()).add(nt)
+
+        self._cache.pop('follow', None)
+        self._cache['_follow_masks'] = solve_unions(
+            table.ranges, base, deps, 0)
@@ -1,6 +1,10 @@
 import PyQt5.QtWidgets as qtw
+from PyQt5 import QtCore as qtc
 from PyQt5 import uic
 
+# How long the dial has to stay put before factoring is tried, in ms.
+DIAL_DELAY = 250
+
 
 class MainWindow(qtw.QMainWindow):
     def __init__(self, ctrl):
@@ -15,7 +19,14 @@ class MainWindow(qtw.QMainWindow):
         self.btn_remove_lr.clicked.connect(self.eliminate_left_recursions)
         self.btn_to_proper.clicked.connect(self.to_proper)
 
-        self.dial_steps.valueChanged.connect(self.factored_in)
+        # Every tick of the dial restarts the timer, so only the value it
+        # stops at gets asked about.
+        self.dial_timer = qtc.QTimer(self)
+        self.dial_timer.setSingleShot(True)
+        self.dial_timer.setInterval(DIAL_DELAY)
+        self.dial_timer.timeout.connect(self.factored_in)
+        self.dial_steps.valueChanged.connect(
+            lambda value: self.dial_timer.start())
 
     def update_combo_boxes(self, index):
         self.combo_grammar.addItem(f'G{index-1}')
@@ -45,14 +56,18 @@ class MainWindow(qtw.QMainWindow):
     def eliminate_left_recursions(self):
         index = self.combo_grammar.currentIndex()-1
 
-        ...
+        self.ctrl.eliminate_left_recursions(index)
 
     def factored_in(self):
         index = self.combo_grammar.currentIndex()-1
+        if index < 0:
+            return
         steps = self.dial_steps.value()
 
-        answer = self.ctrl.factored_in(index, steps)
+        self.factorable_result.setText('...')
+        self.ctrl.factored_in(index, steps)
 
+    def show_factorable(self, answer):
         self.factorable_result.setText(answer)
 
     def show_grammar(self):
@@ -0,0 +1,317 @@
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from .productions import ProductionTable
+from .symbol import SymbolTable
+
+EPSILON_BIT = 1 << SymbolTable.EPSILON_ID
+EOS_BIT = 1 << SymbolTable.EOS_ID
+
+Users = Dict[int, Dict[int, int]]
+Equation = Callable[[int], Tuple[int, Set[int]]]
+
+# Cache entries that can be brought up to date after an edit. Anything else
+# a grammar has cached is simply dropped.
+INCREMENTAL = ('_users', '_nullable_ids', '_first_masks', '_first_nt_masks',
+               '_follow_masks')
+
+
+def build_users(table: ProductionTable) -> Users:
+    # users[B][A] = how many times B appears in the productions of A
+    users: Users = {}
+    for lhs, rhs in zip(table.lhs, table.rhs):
+        for code in rhs:
+            if code >= 0:
+                counts = users.setdefault(code, {})
+                counts[lhs] = counts.get(lhs, 0) + 1
+    return users
+
+
+def update(
+    cache: Dict[str, Any],
+    old: ProductionTable,
+    new: ProductionTable,
+    edited: Set[int],
+    start: int,
+) -> None:
+    # Brings the analyses in `cache`, computed for `old`, up to date with
+    # `new`, which differs from it only in the productions of `edited`.
+    #
+    # Every analysis is a system of equations `value[n] = base[n] | value[d]
+    # for d in deps[n]`, and an edit only changes the equations of a few
+    # non-terminals. Those are updated by delete-and-rederive: drop the bits
+    # that may have lost their support, propagating only through values
+    # that actually contain them, then grow the values back from the new
+    # equations, again only following values that change. Cached dicts and
+    # sets are replaced rather than changed in place, since copies of the
+    # grammar may share them.
+    #
+    # When a deletion spreads over a large part of the grammar, redoing the
+    # analysis from scratch is cheaper, so that entry is dropped instead and
+    # recomputed on next use.
+    if '_users' in cache:
+        users = cache['_users']
+        for nt in edited:
+            _count(users, nt, old.encoded(nt), -1)
+            _count(users, nt, new.encoded(nt), +1)
+    elif '_nullable_ids' in cache:
+        users = cache['_users'] = build_users(new)
+    else:
+        return
+
+    def old_users(nt):
+        return set(users.get(nt, ())) | edited
+
+    def new_users(nt):
+        return users.get(nt, ())
+
+    old_nullable = cache['_nullable_ids']
+    nullable = _update_nullable(new, users, old_nullable, edited)
+    cache['_nullable_ids'] = nullable
+
+    # Non-terminals whose productions can start with a different set of
+    # symbols than before.
+    changed = set(edited)
+    for nt in nullable ^ old_nullable:
+        changed.update(users.get(nt, ()))
+
+    def first_dependents(nt):
+        return _first_dependents(new, users, nullable, nt)
+
+    limit = max(64, len(new.ranges) // 4)
+
+    if '_first_nt_masks' in cache:
+        first_nt, _ = _delete_and_rederive(
+            changed,
+            cache.pop('_first_nt_masks'),
+            _prefix_equation(old, old_nullable, terminals=False),
+            _prefix_equation(new, nullable, terminals=False),
+            first_dependents,
+            limit,
+        )
+        if first_nt is not None:
+            cache['_first_nt_masks'] = first_nt
+
+    if '_first_masks' not in cache:
+        return
+
+    old_first = cache.pop('_first_masks')
+    first, touched = _delete_and_rederive(
+        changed,
+        {nt: mask & ~EPSILON_BIT for nt, mask in old_first.items()},
+        _prefix_equation(old, old_nullable, terminals=True),
+        _prefix_equation(new, nullable, terminals=True),
+        first_dependents,
+        limit,
+    )
+    if first is None:
+        cache.pop('_follow_masks', None)
+        return
+
+    for nt in nullable:
+        first[nt] = first.get(nt, 0) | EPSILON_BIT
+    cache['_first_masks'] = first
+
+    if '_follow_masks' not in cache:
+        return
+
+    # FOLLOW(A) changes when a production containing A changes, or when
+    # FIRST changes for something that can come after it.
+    changed = set()
+    for nt in edited:
+        for table in (old, new):
+            changed.update(_non_terminals(table.encoded(nt)))
+    for nt in touched | (nullable ^ old_nullable):
+        if first.get(nt) != old_first.get(nt):
+            for user in users.get(nt, ()):
+                changed.update(_non_terminals(new.encoded(user)))
+
+    def follow_dependents(nt):
+        # Non-terminals that can end a production of `nt`.
+        for rhs in new.encoded(nt):
+            for code in reversed(rhs):
+                if code < 0:
+                    break
+                yield code
+                if code not in nullable:
+                    break
+
+    follow, _ = _delete_and_rederive(
+        changed,
+        cache.pop('_follow_masks'),
+        _follow_equation(old, old_users, old_first, start),
+        _follow_equation(new, new_users, first, start),
+        follow_dependents,
+        limit,
+    )
+    if follow is not None:
+        cache['_follow_masks'] = follow
+
+
+def _count(users: Users, lhs: int, rhss: Iterable, delta: int) -> None:
+    for rhs in rhss:
+        for code in rhs:
+            if code >= 0:
+                counts = users.setdefault(code, {})
+                counts[lhs] = counts.get(lhs, 0) + delta
+                if not counts[lhs]:
+                    del counts[lhs]
+
+
+def _non_terminals(rhss):
+    return (code for rhs in rhss for code in rhs if code >= 0)
+
+
+def _delete_and_rederive(
+    changed: Set[int],
+    old: Dict[int, int],
+    old_equation: Equation,
+    new_equation: Equation,
+    dependents: Callable[[int], Iterable[int]],
+    limit: int,
+) -> Tuple[Optional[Dict[int, int]], Set[int]]:
+
+    # Bits a changed equation no longer provides directly, or that came
+    # through a dependency it no longer has, may be gone...
+    deleted: Dict[int, int] = {}
+    worklist = []
+    for nt in changed:
+        old_base, old_deps = old_equation(nt)
+        new_base, new_deps = new_equation(nt)
+
+        lost = old_base & ~new_base
+        for dep in old_deps - new_deps:
+            lost |= old.get(dep, 0)
+        lost &= old.get(nt, 0)
+
+        if lost:
+            deleted[nt] = lost
+            worklist.append((nt, lost))
+
+    # ...and so may the same bits anywhere they were propagated to.
+    while worklist:
+        nt, lost = worklist.pop()
+        for dependent in dependents(nt):
+            more = lost & old.get(dependent, 0) & ~deleted.get(dependent, 0)
+            if more:
+                deleted[dependent] = deleted.get(dependent, 0) | more
+                worklist.append((dependent, more))
+
+        if len(deleted) > limit:
+            return None, set()
+
+    values = dict(old)
+    for nt, lost in deleted.items():
+        values[nt] &= ~lost
+
+    # Rederive whatever is still supported, plus anything new.
+    touched = set(changed) | set(deleted)
+    pending = set(touched)
+    while pending:
+        nt = pending.pop()
+        base, deps = new_equation(nt)
+        value = base
+        for dep in deps:
+            value |= values.get(dep, 0)
+
+        if value != values.get(nt, 0):
+            values[nt] = value
+            touched.add(nt)
+            pending.update(dependents(nt))
+
+    return values, touched
+
+
+def _update_nullable(
+    table: ProductionTable,
+    users: Users,
+    old: Set[int],
+    edited: Set[int],
+) -> Set[int]:
+    # The same idea for a plain set: forget every nullable non-terminal that
+    # might have been relying on an edited one, then rebuild from there.
+    lost: Set[int] = set()
+    worklist = [nt for nt in edited if nt in old]
+    while worklist:
+        nt = worklist.pop()
+        if nt not in lost:
+            lost.add(nt)
+            worklist.extend(user for user in users.get(nt, ()) if user in old)
+
+    nullable = old - lost
+
+    worklist = list(lost | edited)
+    while worklist:
+        nt = worklist.pop()
+        if nt in nullable:
+            continue
+        if any(all(code >= 0 and code in nullable for code in rhs)
+               for rhs in table.encoded(nt)):
+            nullable.add(nt)
+            worklist.extend(users.get(nt, ()))
+
+    return nullable
+
+
+def _first_dependents(table, users, nullable, nt):
+    # Non-terminals with a production where `nt` can be the first symbol.
+    for user in users.get(nt, ()):
+        if any(_can_start(rhs, nt, nullable) for rhs in table.encoded(user)):
+            yield user
+
+
+def _can_start(rhs, nt, nullable) -> bool:
+    for code in rhs:
+        if code == nt:
+            return True
+        if code < 0 or code not in nullable:
+            return False
+    return False
+
+
+def _prefix_equation(table, nullable, terminals: bool) -> Equation:
+    # FIRST (terminals=True) and FIRST-NT share their dependencies: A
+    # depends on every B that can start one of its productions.
+    def equation(nt):
+        base = 0
+        deps = set()
+        for rhs in table.encoded(nt):
+            for code in rhs:
+                if code < 0:
+                    if terminals:
+                        base |= 1 << ~code
+                    break
+                if not terminals:
+                    base |= 1 << code
+                deps.add(code)
+                if code not in nullable:
+                    break
+        return base, deps
+
+    return equation
+
+
+def _follow_equation(table, users, first, start) -> Equation:
+    def equation(nt):
+        base = EOS_BIT if nt == start else 0
+        deps = set()
+        for user in users(nt):
+            for rhs in table.encoded(user):
+                suffix_first = EPSILON_BIT
+                for code in reversed(rhs):
+                    if code < 0:
+                        suffix_first = 1 << ~code
+                        continue
+
+                    if code == nt:
+                        base |= suffix_first & ~EPSILON_BIT
+                        if suffix_first & EPSILON_BIT:
+                            deps.add(user)
+
+                    symbol_first = first.get(code, 0)
+                    if symbol_first & EPSILON_BIT:
+                        suffix_first |= symbol_first & ~EPSILON_BIT
+                    else:
+                        suffix_first = symbol_first
+        return base, deps
+
+    return equation
@@ -0,0 +1,407 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .fixpoint import solve_unions
+from .ll1 import Node, END, token_columns, _with_eos
+from .symbol import Symbol, NonTerminal, ParseError, SymbolTable, bits
+
+EOS_ID = SymbolTable.EOS_ID
+EPSILON_BIT = 1 << SymbolTable.EPSILON_ID
+
+
+class LRConflict(NamedTuple):
+    state: int
+    lookahead: Symbol
+    kind: str
+    productions: Tuple[Tuple[NonTerminal, Tuple[Symbol, ...]], ...]
+
+
+class LALRTable:
+    # LALR(1) parsing tables over the LR(0) automaton of the grammar.
+    #
+    # Productions are numbered as in the grammar's production table, plus
+    # an extra `S' -> S` numbered `len(table.rhs)`. An item is a single int,
+    # `offsets[p] + dot`, and a state is identified by the sorted tuple of
+    # its kernel items.
+    #
+    # `action[state]` maps terminal IDs to `s` (shift and go to state `s`)
+    # or `~p` (reduce by production `p`, where reducing by `S' -> S` means
+    # accept), falling back to `default[state]` (a reduction, or None for
+    # an error). `goto[state]` maps non-terminal IDs to states. Conflicts
+    # are resolved in favour of shifting, or of the earliest production,
+    # and listed in `conflicts`.
+    #
+    # Lookaheads are computed with the relations of DeRemer and Pennello
+    # (1982): every non-terminal transition (p, A) gets the terminals that
+    # can follow it, from DR (read directly after the transition), `reads`
+    # (through nullable non-terminals) and `includes` (through the end of
+    # an enclosing production), each closure being one solve_unions.
+    def __init__(self, grammar) -> None:
+        table = grammar.production_rules
+        symbols = table.symbols
+
+        self.symbols = symbols
+        self.productions = table
+
+        start = table.id(grammar.start_symbol)
+        accept = len(table.rhs)
+        rhss = table.rhs + ((start,),)
+
+        offsets = []
+        item_next: List[Any] = []
+        for rhs in rhss:
+            offsets.append(len(item_next))
+            item_next.extend(rhs)
+            item_next.append(None)
+
+        # Non-terminals whose productions get added to the closure of an
+        # item with the dot before `nt`.
+        leading = {nt: set() for nt in table.ranges}
+        for lhs, rhs in zip(table.lhs, table.rhs):
+            if rhs and rhs[0] >= 0:
+                leading[lhs].add(rhs[0])
+        closure_masks = solve_unions(
+            table.ranges, {nt: 1 << nt for nt in table.ranges}, leading, 0)
+
+        # The LR(0) automaton.
+        kernels: List[Tuple[int, ...]] = [(offsets[accept],)]
+        states: Dict[Tuple[int, ...], int] = {kernels[0]: 0}
+        transitions: List[Dict[int, int]] = []
+        completed: List[List[int]] = []
+
+        item_production = []
+        for p, rhs in enumerate(rhss):
+            item_production.extend([p] * (len(rhs) + 1))
+
+        def goto_state(key):
+            state = states.get(key)
+            if state is None:
+                state = states[key] = len(kernels)
+                kernels.append(key)
+            return state
+
+        # The non-kernel items of a state only depend on the non-terminals
+        # its kernel has the dot before, and many states share those, so
+        # their successors (and the states these lead to) are worked out
+        # once per set of such non-terminals.
+        closures: Dict[int, Tuple[Dict[int, Tuple[int, ...]], List[int],
+                                  Dict[int, int]]] = {}
+
+        for kernel in kernels:
+            closure_mask = 0
+            successors: Dict[int, List[int]] = {}
+            reductions = []
+            for item in kernel:
+                code = item_next[item]
+                if code is None:
+                    reductions.append(item_production[item])
+                else:
+                    successors.setdefault(code, []).append(item + 1)
+                    if code >= 0:
+                        closure_mask |= closure_masks.get(code, 0)
+
+            closure = closures.get(closure_mask)
+            if closure is None:
+                closure = closures[closure_mask] = self._closure(
+                    closure_mask, table, offsets, item_next)
+            closure_successors, closure_reductions, closure_targets = closure
+
+            state_transitions = {}
+            for code, key in closure_successors.items():
+                if code not in successors:
+                    state = closure_targets.get(code)
+                    if state is None:
+                        state = closure_targets[code] = goto_state(key)
+                    state_transitions[code] = state
+            for code, items in successors.items():
+                items.extend(closure_successors.get(code, ()))
+                key = tuple(sorted(items))
+                state_transitions[code] = goto_state(key)
+
+            transitions.append(state_transitions)
+            completed.append(reductions + closure_reductions)
+
+        self.kernels = kernels
+
+        # Non-terminal transitions and their relations.
+        nullable = grammar._nullable_ids
+        suffix_first = grammar._suffix_first
+
+        nt_transitions: Dict[Tuple[int, int], int] = {}
+        for state, state_transitions in enumerate(transitions):
+            for code in state_transitions:
+                if code >= 0:
+                    nt_transitions[state, code] = len(nt_transitions)
+
+        direct = {}
+        reads: Dict[int, Set[int]] = {}
+        for (state, nt), x in nt_transitions.items():
+            target = transitions[state][nt]
+            mask = 0
+            for code in transitions[target]:
+                if code < 0:
+                    mask |= 1 << ~code
+                elif code in nullable:
+                    reads.setdefault(x, set()).add(
+                        nt_transitions[target, code])
+            direct[x] = mask
+        direct[nt_transitions[0, start]] |= 1 << EOS_ID
+
+        # Walking a production of A from the state of transition (state, A):
+        # every transition (q, B) on the way with a nullable rest of the
+        # production includes (state, A), and the state reached at the end
+        # looks back at it. After the first step the path only depends on
+        # the state reached, which is often shared, so the rest is cached.
+        def walk(current, p):
+            rhs = table.rhs[p]
+            tails = []
+            for i in range(1, len(rhs)):
+                code = rhs[i]
+                if code >= 0 and suffix_first[p][i + 1] & EPSILON_BIT:
+                    tails.append(nt_transitions[current, code])
+                current = transitions[current][code]
+            return current, tails
+
+        walks: Dict[Tuple[int, int], Tuple[int, List[int]]] = {}
+        includes: Dict[int, Set[int]] = {}
+        lookback: Dict[Tuple[int, int], List[int]] = {}
+        for (state, nt), x in nt_transitions.items():
+            begin, end = table.ranges[nt]
+            for p in range(begin, end):
+                rhs = table.rhs[p]
+                if not rhs:
+                    lookback.setdefault((state, p), []).append(x)
+                    continue
+
+                code = rhs[0]
+                if code >= 0 and suffix_first[p][1] & EPSILON_BIT:
+                    includes.setdefault(
+                        nt_transitions[state, code], set()).add(x)
+
+                key = transitions[state][code], p
+                path = walks.get(key)
+                if path is None:
+                    path = walks[key] = walk(*key)
+
+                last, tails = path
+                for y in tails:
+                    includes.setdefault(y, set()).add(x)
+                lookback.setdefault((last, p), []).append(x)
+
+        read = solve_unions(range(len(nt_transitions)), direct, reads, 0)
+        follow = solve_unions(range(len(nt_transitions)), read, includes, 0)
+
+        # The tables.
+        decoded = tuple((symbols.non_terminals[lhs], table.decode(rhs))
+                        for lhs, rhs in zip(table.lhs, table.rhs))
+
+        self.action: List[Dict[int, int]] = []
+        self.goto: List[Dict[int, int]] = []
+        self.default: List[Optional[int]] = []
+        self.conflicts: List[LRConflict] = []
+
+        for state, state_transitions in enumerate(transitions):
+            action = {~code: target
+                      for code, target in state_transitions.items()
+                      if code < 0}
+            goto = {code: target
+                    for code, target in state_transitions.items()
+                    if code >= 0}
+
+            shifts = 0
+            for t in action:
+                shifts |= 1 << t
+
+            lookaheads: Dict[int, int] = {}
+            for p in sorted(completed[state]):
+                if p == accept:
+                    lookaheads[p] = 1 << EOS_ID
+                    continue
+                lookahead = 0
+                for x in lookback.get((state, p), ()):
+                    lookahead |= follow[x]
+                lookaheads[p] = lookahead
+
+            seen = shared = 0
+            for lookahead in lookaheads.values():
+                shared |= seen & lookahead
+                seen |= lookahead
+            conflicting = shared | seen & shifts
+
+            for t in bits(conflicting):
+                ps = [p for p, lookahead in lookaheads.items()
+                      if lookahead >> t & 1]
+                if t in action:
+                    kind = 'shift/reduce'
+                elif ps[-1] == accept:
+                    kind = 'accept/reduce'
+                else:
+                    kind = 'reduce/reduce'
+                self.conflicts.append(LRConflict(
+                    state,
+                    symbols.terminals[t],
+                    kind,
+                    tuple(decoded[p] for p in ps if p != accept),
+                ))
+                if t not in action:
+                    action[t] = ~ps[-1] if ps[-1] == accept else ~ps[0]
+
+            # A state's only reduction becomes its default action instead
+            # of getting an entry for each of its lookaheads, which can
+            # delay detecting an error by a few reductions, but never
+            # shifts a wrong token. An &-production is never a default:
+            # reducing by it pops nothing, so it could take the parser back
+            # to the same state, forever.
+            candidates = [p for p in lookaheads if p != accept]
+            default = None
+            if len(candidates) == 1 and table.rhs[candidates[0]]:
+                default = candidates[0]
+
+            for p, lookahead in lookaheads.items():
+                if p != default:
+                    for t in bits(lookahead & ~conflicting):
+                        action[t] = ~p
+
+            self.action.append(action)
+            self.default.append(None if default is None else ~default)
+            self.goto.append(goto)
+
+        self.accept = accept
+        self.lengths = tuple(len(rhs) for rhs in table.rhs)
+        self.lhs = table.lhs
+        self.decoded = decoded
+
+        self.columns = token_columns(symbols)
+
+    @staticmethod
+    def _closure(mask, table, offsets, item_next):
+        successors: Dict[int, List[int]] = {}
+        reductions = []
+        for nt in bits(mask):
+            begin, end = table.ranges[nt]
+            for p in range(begin, end):
+                code = item_next[offsets[p]]
+                if code is None:
+                    reductions.append(p)
+                else:
+                    successors.setdefault(code, []).append(offsets[p] + 1)
+
+        keys = {code: tuple(sorted(items)) for code, items in successors.items()}
+        return keys, reductions, {}
+
+    def __len__(self) -> int:
+        return len(self.kernels)
+
+    def recognize(self, tokens: Iterable) -> bool:
+        action = self.action
+        goto = self.goto
+        lengths = self.lengths
+        lhs = self.lhs
+        columns = self.columns
+        accept = ~self.accept
+
+        default = self.default
+        guarded = bool(self.conflicts)
+
+        stack = [0]
+        for i, token in enumerate(_with_eos(tokens)):
+            t = columns.get(token)
+            if t is None:
+                return False
+
+            seen = [[stack[-1], len(stack), len(stack)]]
+            while True:
+                a = action[stack[-1]].get(t)
+                if a is None:
+                    a = default[stack[-1]]
+                    if a is None:
+                        return False
+                if a >= 0:
+                    stack.append(a)
+                    break
+                if a == accept:
+                    return True
+
+                p = ~a
+                if lengths[p]:
+                    del stack[-lengths[p]:]
+                stack.append(goto[stack[-1]][lhs[p]])
+                if guarded and _reducing_forever(stack, seen):
+                    raise _reducing_error(token, i)
+
+        return False
+
+    def parse(self, tokens: Iterable) -> Node:
+        action = self.action
+        goto = self.goto
+        lengths = self.lengths
+        lhs = self.lhs
+        columns = self.columns
+        decoded = self.decoded
+        default = self.default
+        accept = ~self.accept
+        guarded = bool(self.conflicts)
+
+        stack = [0]
+        values: List[Any] = []
+        for i, token in enumerate(_with_eos(tokens)):
+            t = columns.get(token)
+            if t is None:
+                raise ParseError(f'Unknown terminal `{token}` at token {i + 1}')
+
+            seen = [[stack[-1], len(stack), len(stack)]]
+            while True:
+                a = action[stack[-1]].get(t)
+                if a is None:
+                    a = default[stack[-1]]
+                if a is None:
+                    name = '$' if token is END else token
+                    raise ParseError(f'Unexpected `{name}` at token {i + 1}')
+                if a >= 0:
+                    stack.append(a)
+                    values.append(token)
+                    break
+                if a == accept:
+                    return values[0]
+
+                p = ~a
+                n = lengths[p]
+                children = values[len(values) - n:]
+                if n:
+                    del stack[-n:]
+                    del values[-n:]
+                values.append(Node(decoded[p][0], children))
+                stack.append(goto[stack[-1]][lhs[p]])
+                if guarded and _reducing_forever(stack, seen):
+                    raise _reducing_error(token, i)
+
+        raise ParseError('Unexpected end of input')
+
+
+def _reducing_forever(stack: List[int], seen: List[List[int]]) -> bool:
+    # Only a table with conflicts can keep reducing without ever shifting.
+    # `seen` holds [state, height, lowest height since] for the states that
+    # have been on top of `stack` since the last shift, as long as what was
+    # below them hasn't been popped. Once a state is back on top, at the
+    # same height or, without having been popped, higher, the reductions
+    # in between will repeat forever.
+    height = len(stack)
+    top = stack[-1]
+    live = []
+    for state, h, low in seen:
+        low = min(low, height - 1)
+        if low < h - 1:
+            continue
+        if state == top and (height == h or low >= h):
+            return True
+        live.append([state, h, low])
+    live.append([top, height, height])
+    seen[:] = live
+    return False
+
+
+def _reducing_error(token, i: int) -> ParseError:
+    name = '$' if token is END else token
+    return ParseError(
+        f'Reducing forever on `{name}` at token {i + 1}: the table has '
+        f'conflicts'
+    )
@@ -0,0 +1,207 @@
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Set
+from typing import Tuple
+
+from .symbol import Symbol, NonTerminal, ParseError, SymbolTable, bits
+
+EOS_ID = SymbolTable.EOS_ID
+EPSILON_BIT = 1 << SymbolTable.EPSILON_ID
+
+# Appended to every token stream, standing for `$`.
+END = object()
+
+
+class Node(NamedTuple):
+    symbol: NonTerminal
+    children: List[Any]
+
+
+class LL1Table:
+    # Dense predictive parsing table: `cells[nt * width + t]` is the index
+    # (in the grammar's production table) of the production to expand `nt`
+    # with when the lookahead is terminal `t`, or -1 for an error. Rows and
+    # columns are the symbol table IDs, so no translation is needed while
+    # parsing.
+    #
+    # Conflicting cells keep the first of the alternatives, and every
+    # conflict is listed in `conflicts`, so the table can still be inspected
+    # (or used, with that bias) for grammars that are not LL(1).
+    def __init__(self, grammar) -> None:
+        table = grammar.production_rules
+        symbols = table.symbols
+
+        self.symbols = symbols
+        self.productions = table
+        self.start = table.id(grammar.start_symbol)
+        self.width = width = len(symbols.terminals)
+        self.conflicts = list(grammar.ll1_conflicts())
+
+        size = len(symbols.non_terminals) * width
+        self.cells = cells = array('i', [-1]) * size
+        suffix_first = grammar._suffix_first
+        follow = grammar._follow_masks
+
+        for p in reversed(range(len(table.rhs))):
+            nt = table.lhs[p]
+            lookahead = suffix_first[p][0]
+            if lookahead & EPSILON_BIT:
+                lookahead |= follow.get(nt, 0)
+
+            row = nt * width
+            for t in bits(lookahead & ~EPSILON_BIT):
+                cells[row + t] = p
+
+        # What to push when expanding each production: its symbols, last
+        # one first.
+        self.expansions = tuple(tuple(reversed(rhs)) for rhs in table.rhs)
+        self.decoded = tuple(table.decode(rhs) for rhs in table.rhs)
+
+        self.columns = token_columns(symbols)
+
+    def __getitem__(self, key: Tuple[NonTerminal, Symbol]) -> Tuple[Symbol, ...]:
+        nt, terminal = key
+        ids = self.symbols.ids
+        p = self.cells[ids[nt] * self.width + ids[terminal]]
+        if p < 0:
+            raise KeyError(key)
+        return self.decoded[p]
+
+    def recognize(self, tokens: Iterable) -> bool:
+        if self.conflicts:
+            # Slower, but stops expanding forever (see _events).
+            return all(event[0] != 'error' for event in self._events(tokens))
+
+        cells = self.cells
+        width = self.width
+        expansions = self.expansions
+        columns = self.columns
+
+        stack = [~EOS_ID, self.start]
+        pop = stack.pop
+        extend = stack.extend
+
+        for token in _with_eos(tokens):
+            t = columns.get(token)
+            if t is None:
+                return False
+
+            top = pop()
+            while top >= 0:
+                p = cells[top * width + t]
+                if p < 0:
+                    return False
+                extend(expansions[p])
+                top = pop()
+
+            if top != ~t:
+                return False
+
+        return not stack
+
+    def events(self, tokens: Iterable) -> Iterator[Tuple]:
+        # Yields ('enter', nt, production), ('token', token) and
+        # ('exit', nt), in the order of a leftmost derivation. Raises
+        # ParseError at the first token that doesn't fit.
+        for event in self._events(tokens):
+            if event[0] == 'error':
+                raise ParseError(event[1])
+            yield event
+
+    def _events(self, tokens: Iterable) -> Iterator[Tuple]:
+        # Like events, but yields ('error', message) and stops instead of
+        # raising. Only a table with conflicts can expand a non-terminal
+        # again inside its own expansion without consuming a token (it is
+        # left recursive, and would do so forever), which raises
+        # ParseError.
+        cells = self.cells
+        width = self.width
+        expansions = self.expansions
+        columns = self.columns
+        decoded = self.decoded
+        non_terminals = self.symbols.non_terminals
+        guarded = bool(self.conflicts)
+
+        # Codes >= `exit` mark the end of a production of `code - exit`.
+        exit = len(non_terminals)
+        stack = [~EOS_ID, self.start]
+        # Non-terminals expanded since the last token and not exited yet.
+        expanding: Set[int] = set()
+
+        for i, token in enumerate(_with_eos(tokens)):
+            t = columns.get(token)
+            if t is None:
+                yield ('error', f'Unknown terminal `{token}` at token {i + 1}')
+                return
+
+            top = stack.pop()
+            while top >= 0:
+                if top >= exit:
+                    expanding.discard(top - exit)
+                    yield ('exit', non_terminals[top - exit])
+                else:
+                    p = cells[top * width + t]
+                    if p < 0:
+                        yield ('error',
+                               f'Unexpected `{_name(token)}` at token {i + 1}, '
+                               f'while expanding {non_terminals[top]}')
+                        return
+                    if guarded:
+                        if top in expanding:
+                            raise ParseError(
+                                f'{non_terminals[top]} expands forever on '
+                                f'`{_name(token)}` at token {i + 1}: the '
+                                f'grammar is left recursive'
+                            )
+                        expanding.add(top)
+                    yield ('enter', non_terminals[top], decoded[p])
+                    stack.append(top + exit)
+                    stack.extend(expansions[p])
+                top = stack.pop()
+
+            if top != ~t:
+                expected = self.symbols.terminals[~top]
+                yield ('error',
+                       f'Unexpected `{_name(token)}` at token {i + 1}, '
+                       f'expected `{expected}`')
+                return
+
+            expanding.clear()
+            if t != EOS_ID:
+                yield ('token', token)
+
+    def parse(self, tokens: Iterable) -> Node:
+        roots: List[Node] = []
+        path: List[List[Any]] = [roots]
+
+        for event in self.events(tokens):
+            kind = event[0]
+            if kind == 'enter':
+                node = Node(event[1], [])
+                path[-1].append(node)
+                path.append(node.children)
+            elif kind == 'exit':
+                path.pop()
+            else:
+                path[-1].append(event[1])
+
+        return roots[0]
+
+
+def token_columns(symbols: SymbolTable) -> Dict[Any, int]:
+    # Terminal IDs for everything that can appear in a token stream: tokens
+    # can be given as Terminals or as plain strings.
+    columns: Dict[Any, int] = {END: EOS_ID}
+    for t, terminal in enumerate(symbols.terminals):
+        if t not in (SymbolTable.EPSILON_ID, EOS_ID):
+            columns[terminal] = t
+            columns[terminal.value] = t
+    return columns
+
+
+def _with_eos(tokens: Iterable) -> Iterator:
+    yield from tokens
+    yield END
+
+
+def _name(token) -> str:
+    return '$' if token is END else str(token)
@@ -0,0 +1,106 @@
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple
+
+from .symbol import Symbol, NonTerminal, Epsilon, SymbolTable
+
+EPSILON = Epsilon('&')
+
+Encoded = Tuple[int, ...]
+
+
+class ProductionTable(Mapping[NonTerminal, Tuple[Tuple[Symbol, ...], ...]]):
+    # Immutable production storage. Every right-hand side is a tuple of
+    # symbol codes (see SymbolTable), all of them kept in one flat tuple
+    # where the productions of each non-terminal occupy a contiguous
+    # `ranges[nt]` slice. The position of a production in that tuple is its
+    # index for the lifetime of the table.
+    #
+    # Edits build a new table that shares the symbol table and every
+    # untouched right-hand side with the old one, so copying a grammar is
+    # free and transforming it only costs what actually changes.
+    __slots__ = ('symbols', 'lhs', 'rhs', 'ranges')
+
+    def __init__(
+        self,
+        symbols: SymbolTable,
+        rows: Iterable[Tuple[int, Iterable[Encoded]]],
+    ) -> None:
+        lhs: List[int] = []
+        rhs: List[Encoded] = []
+        ranges: Dict[int, Tuple[int, int]] = {}
+
+        for nt, productions in rows:
+            start = len(rhs)
+            rhs.extend(productions)
+            if len(rhs) > start:
+                lhs.extend([nt] * (len(rhs) - start))
+                ranges[nt] = (start, len(rhs))
+
+        self.symbols = symbols
+        self.lhs = tuple(lhs)
+        self.rhs = tuple(rhs)
+        self.ranges = ranges
+
+    @classmethod
+    def build(
+        cls,
+        productions: Iterable[Tuple[NonTerminal, Iterable[Symbol]]],
+        symbols: SymbolTable = None,
+    ) -> 'ProductionTable':
+        symbols = symbols or SymbolTable()
+        rows: Dict[int, List[Encoded]] = {}
+        # Identical right-hand sides share one tuple.
+        pool: Dict[Encoded, Encoded] = {}
+
+        for lhs, rhs in productions:
+            encoded = tuple(symbols.encode(s) for s in rhs if s is not EPSILON)
+            encoded = pool.setdefault(encoded, encoded)
+            rows.setdefault(symbols.intern(lhs), []).append(encoded)
+
+        return cls(symbols, rows.items())
+
+    def replace(self, rows: Mapping[int, Iterable[Encoded]]) -> 'ProductionTable':
+        # New table where the productions of each non-terminal in `rows` are
+        # swapped for the given ones. New non-terminals go at the end, and a
+        # non-terminal left with no productions is dropped.
+        def merged():
+            for nt, (start, stop) in self.ranges.items():
+                yield nt, rows.get(nt, self.rhs[start:stop])
+            for nt, productions in rows.items():
+                if nt not in self.ranges:
+                    yield nt, productions
+
+        return ProductionTable(self.symbols, merged())
+
+    def encoded(self, nt: int) -> Tuple[Encoded, ...]:
+        start, stop = self.ranges.get(nt, (0, 0))
+        return self.rhs[start:stop]
+
+    def encode(self, rhs: Iterable[Symbol]) -> Encoded:
+        encode = self.symbols.encode
+        return tuple(encode(s) for s in rhs if s is not EPSILON)
+
+    def decode(self, rhs: Encoded) -> Tuple[Symbol, ...]:
+        if not rhs:
+            return (EPSILON,)
+        decode = self.symbols.decode
+        return tuple(decode(code) for code in rhs)
+
+    def id(self, nt: NonTerminal) -> int:
+        return self.symbols.ids[nt]
+
+    def __getitem__(self, nt: NonTerminal) -> Tuple[Tuple[Symbol, ...], ...]:
+        id = self.symbols.ids.get(nt)
+        if id is None or id not in self.ranges or not isinstance(nt, NonTerminal):
+            raise KeyError(nt)
+        return tuple(self.decode(rhs) for rhs in self.encoded(id))
+
+    def __contains__(self, nt) -> bool:
+        return (isinstance(nt, NonTerminal) and
+                self.symbols.ids.get(nt) in self.ranges)
+
+    def __iter__(self) -> Iterator[NonTerminal]:
+        non_terminals = self.symbols.non_terminals
+        return (non_terminals[nt] for nt in self.ranges)
+
+    def __len__(self) -> int:
+        return len(self.ranges)
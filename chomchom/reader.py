@@ -0,0 +1,84 @@
+import re
+
+from typing import Iterable, Iterator, List, Tuple
+
+from .symbol import Symbol, NonTerminal, ParseError, symbol_from_string
+
+# `->` and `|` don't need to be surrounded by spaces, and a `#` at the
+# start of a token comments out the rest of the line.
+TOKEN = re.compile(
+    r'(?P<arrow>->)'
+    r'|(?P<bar>\|)'
+    r'|(?P<comment>#.*)'
+    r'|(?P<symbol>(?!->)[^\s|#](?:(?!->)[^\s|])*)'
+)
+
+EXPECTED_ARROW = 'Expected a `->`'
+EXPECTED_SYMBOLS = 'Expected a sequence of symbols next to the `|`'
+
+
+def read_productions(
+    lines: Iterable[str]
+) -> Iterator[Tuple[NonTerminal, List[Symbol]]]:
+    lhs = None
+    number = 0
+
+    for number, line in enumerate(lines, 1):
+        head = None
+        head_column = 0
+        rhs: List[Symbol] = []
+        # Lines starting with `|` continue the previous rule.
+        in_rhs = False
+
+        for match in TOKEN.finditer(line):
+            kind = match.lastgroup
+            column = match.start() + 1
+
+            if kind == 'comment':
+                break
+
+            if in_rhs:
+                if kind == 'symbol':
+                    rhs.append(_symbol(match.group(), number, column))
+                elif kind == 'bar':
+                    if not rhs:
+                        raise ParseError(EXPECTED_SYMBOLS, number, column)
+                    yield lhs, rhs
+                    rhs = []
+                else:
+                    raise ParseError('Unexpected `->`', number, column)
+
+            elif head is None:
+                if kind == 'bar' and lhs is not None:
+                    in_rhs = True
+                    continue
+                if kind != 'symbol':
+                    raise ParseError(EXPECTED_ARROW, number, column)
+                head = _symbol(match.group(), number, column)
+                head_column = column
+
+            else:
+                if kind != 'arrow':
+                    raise ParseError(EXPECTED_ARROW, number, column)
+                if not isinstance(head, NonTerminal):
+                    raise ParseError(
+                        f"'{head}' is not a valid NonTerminal",
+                        number, head_column)
+                lhs = head
+                in_rhs = True
+
+        column = len(line.rstrip('\r\n')) + 1
+
+        if in_rhs:
+            if not rhs:
+                raise ParseError(EXPECTED_SYMBOLS, number, column)
+            yield lhs, rhs
+        elif head is not None:
+            raise ParseError(EXPECTED_ARROW, number, column)
+
+
+def _symbol(string: str, line: int, column: int) -> Symbol:
+    try:
+        return symbol_from_string(string)
+    except ParseError as e:
+        raise ParseError(str(e), line, column) from None
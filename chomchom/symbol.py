@@ -1,23 +1,63 @@
 import re
+import threading
+
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 
 class ParseError(ValueError):
-    pass
+    def __init__(
+        self,
+        message: str,
+        line: Optional[int] = None,
+        column: Optional[int] = None,
+    ) -> None:
+        if line is not None:
+            message = f'{message} (line {line}, column {column})'
+        super().__init__(message)
+
+        self.line = line
+        self.column = column
 
 
 class Symbol:
+    # Symbols are interned: building the same string as the same kind of
+    # symbol twice gives back the same object, so equality and hashing are
+    # plain identity checks.
+    __slots__ = ('value',)
+
     REGEX = re.compile(r'.*')
 
-    def __init__(self, string: str) -> None:
-        match = self.REGEX.match(string)
+    _interned: Dict[Tuple[type, str], 'Symbol'] = {}
 
-        if match:
-            string = match.group()
-        else:
-            class_name = type(self).__name__
+    def __new__(cls, string: str) -> 'Symbol':
+        try:
+            return cls._interned[cls, string]
+        except KeyError:
+            pass
+
+        # The whole string, or `$` would let a trailing newline through.
+        match = cls.REGEX.fullmatch(string)
+
+        if not match:
+            class_name = cls.__name__
             raise ParseError(f"'{string}' is not a valid {class_name}")
 
-        self.value = string
+        return cls._intern(match.group())
+
+    @classmethod
+    def _intern(cls, value: str) -> 'Symbol':
+        symbol = object.__new__(cls)
+        symbol.value = value
+        return cls._interned.setdefault((cls, value), symbol)
+
+    def __reduce__(self):
+        return (type(self), (self.value,))
+
+    def __copy__(self) -> 'Symbol':
+        return self
+
+    def __deepcopy__(self, memo) -> 'Symbol':
+        return self
 
     def __str__(self) -> str:
         return self.value
@@ -26,49 +66,142 @@ class Symbol:
         class_name = type(self).__name__
         return f"{class_name}('{self.value}')"
 
-    def __hash__(self) -> int:
-        return hash(self.value)
-
-    def __eq__(self, other) -> bool:
-        if not isinstance(other, Symbol):
-            raise NotImplemented
-
-        return self.value == other.value
-
     def __lt__(self, other) -> bool:
         if not isinstance(other, Symbol):
-            raise NotImplemented
+            return NotImplemented
 
         return self.value < other.value
 
 
 class NonTerminal(Symbol):
+    __slots__ = ()
     REGEX = re.compile(r'^([A-Z]\d*)$')
 
 
 class Terminal(Symbol):
+    __slots__ = ()
     REGEX = re.compile(r'^([^A-Z&$\s]+)$')
 
 
 class Epsilon(Symbol):
+    __slots__ = ()
     REGEX = re.compile(r'^&$')
 
 
 class EoS(Symbol):
+    __slots__ = ()
     REGEX = re.compile(r'^\$$')
 
 
+# One pass over the token decides its kind; the alternatives are mutually
+# exclusive, so the order doesn't matter.
+TOKEN = re.compile(
+    r'(?P<NonTerminal>[A-Z]\d*)'
+    r'|(?P<Terminal>[^A-Z&$\s]+)'
+    r'|(?P<Epsilon>&)'
+    r'|(?P<EoS>\$)'
+)
+
+KINDS: Dict[str, type] = {
+    kind.__name__: kind for kind in (NonTerminal, Terminal, Epsilon, EoS)
+}
+
+_from_string: Dict[str, Symbol] = {}
+
+
 def symbol_from_string(string: str) -> Symbol:
     try:
-        return NonTerminal(string)
-    except ParseError:
+        return _from_string[string]
+    except KeyError:
+        pass
+
+    match = TOKEN.fullmatch(string)
+    if not match:
+        raise ParseError(f"Invalid symbol {string}")
+
+    symbol = KINDS[match.lastgroup]._intern(string)
+    return _from_string.setdefault(string, symbol)
+
+
+class SymbolTable:
+    # Dense integer IDs for the symbols of a grammar. Non-terminals and
+    # terminals are numbered separately, so that sets of either kind can be
+    # kept as compact int bitmasks. Epsilon and EoS always take terminal
+    # IDs 0 and 1.
+    #
+    # Encoded productions mix both kinds in one tuple: a non-terminal is
+    # stored as its ID and a terminal as the bitwise complement of its ID,
+    # so `code >= 0` tells them apart.
+    #
+    # Grammars share their table with their copies, which the GUI analyses
+    # from worker threads, so new symbols are added under a lock.
+    EPSILON_ID = 0
+    EOS_ID = 1
+
+    def __init__(self) -> None:
+        self.non_terminals: List[NonTerminal] = []
+        self.terminals: List[Symbol] = [Epsilon('&'), EoS('$')]
+        self.ids: Dict[Symbol, int] = {
+            symbol: i for i, symbol in enumerate(self.terminals)
+        }
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, object]:
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def intern(self, symbol: Symbol) -> int:
         try:
-            return Terminal(string)
-        except ParseError:
-            try:
-                return Epsilon(string)
-            except ParseError:
-                try:
-                    return EoS(string)
-                except ParseError:
-                    raise ParseError(f"Invalid symbol {string}")
+            return self.ids[symbol]
+        except KeyError:
+            pass
+
+        if isinstance(symbol, NonTerminal):
+            symbols: list = self.non_terminals
+        else:
+            symbols = self.terminals
+
+        with self.lock:
+            id = self.ids.get(symbol)
+            if id is None:
+                # Listed before it gets an ID, for readers without the lock.
+                id = len(symbols)
+                symbols.append(symbol)
+                self.ids[symbol] = id
+        return id
+
+    def encode(self, symbol: Symbol) -> int:
+        id = self.intern(symbol)
+        return id if isinstance(symbol, NonTerminal) else ~id
+
+    def decode(self, code: int) -> Symbol:
+        if code >= 0:
+            return self.non_terminals[code]
+        return self.terminals[~code]
+
+    def terminal_mask(self, symbols: Iterable[Symbol]) -> int:
+        mask = 0
+        for symbol in symbols:
+            mask |= 1 << self.intern(symbol)
+        return mask
+
+    def terminal_set(self, mask: int) -> Set[Symbol]:
+        return {self.terminals[id] for id in bits(mask)}
+
+    def non_terminal_set(self, mask: int) -> Set[Symbol]:
+        return {self.non_terminals[id] for id in bits(mask)}
+
+
+def bits(mask: int) -> Iterator[int]:
+    # Scanning the binary string keeps this linear in the mask width, even
+    # for masks with thousands of bits.
+    digits = bin(mask)[:1:-1]
+    i = digits.find('1')
+    while i >= 0:
+        yield i
+        i = digits.find('1', i + 1)
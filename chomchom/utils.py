@@ -1,3 +1,4 @@
+from functools import wraps
 from itertools import combinations, chain
 
 
@@ -19,3 +20,19 @@ def format_follow(grammar) -> str:
         f"follow({str(nt)}) = {{{', '.join(str(f) for f in follows)}}}"
         for nt, follows in grammar.follow.items()
     )
+
+
+def memoized(method):
+    # Caches the result of a no-argument method in `self._cache`, which the
+    # owner clears whenever whatever the result depends on changes.
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self):
+        try:
+            return self._cache[name]
+        except KeyError:
+            value = self._cache[name] = method(self)
+            return value
+
+    return wrapper
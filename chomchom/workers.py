@@ -0,0 +1,47 @@
+from typing import Any, Callable
+
+from PyQt5 import QtCore as qtc
+
+from .factoring import Cancelled
+
+
+class TaskSignals(qtc.QObject):
+    finished = qtc.pyqtSignal(object)
+    failed = qtc.pyqtSignal(str)
+    # Emitted last, whatever happened, cancelled or not.
+    done = qtc.pyqtSignal()
+
+
+class Task(qtc.QRunnable):
+    # Runs `work(should_stop)` on a thread of a QThreadPool. The signals
+    # object is created on the thread that makes the task, so its slots run
+    # there too, and a cancelled task never emits `finished` or `failed`:
+    # a result that arrives after the request was superseded is dropped.
+    #
+    # Cancelling is cooperative: `work` is expected to call `should_stop`
+    # every so often and give up (raising Cancelled) once it is true.
+    def __init__(self, work: Callable[[Callable[[], bool]], Any]) -> None:
+        super().__init__()
+        self.work = work
+        self.signals = TaskSignals()
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def should_stop(self) -> bool:
+        return self.cancelled
+
+    def run(self) -> None:
+        try:
+            result = self.work(self.should_stop)
+        except Cancelled:
+            pass
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(f'{type(e).__name__}: {e}')
+        else:
+            if not self.cancelled:
+                self.signals.finished.emit(result)
+        finally:
+            self.signals.done.emit()
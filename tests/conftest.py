@@ -0,0 +1,10 @@
+import pytest
+
+from chomchom.cache import analyses
+
+
+@pytest.fixture(autouse=True)
+def clear_analyses(monkeypatch):
+    # Results shared between grammars would otherwise leak between tests.
+    monkeypatch.setattr(analyses, 'store', None)
+    analyses.clear()
@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from chomchom import ContextFreeGrammar, NonTerminal, Terminal
+from chomchom.cache import AnalysisCache, DiskCache, analyses, open_store
+
+
+GRAMMAR = '''
+    S -> A B | c
+    A -> a A | &
+    B -> b | A d
+'''
+
+# GRAMMAR, with its non-terminals and alternatives in another order.
+RENAMED = '''
+    X -> c | Y Z
+    Z -> Y d | b
+    Y -> & | a Y
+'''
+
+
+def test_fingerprint_ignores_names_and_order():
+    g = ContextFreeGrammar.from_string(GRAMMAR)
+    h = ContextFreeGrammar.from_string(RENAMED)
+    other = ContextFreeGrammar.from_string('''
+        S -> A B | c
+        A -> a A | &
+        B -> b | A e
+    ''')
+
+    assert g.fingerprint() == h.fingerprint()
+    assert g.fingerprint() != other.fingerprint()
+
+
+def test_canonical_form():
+    g = ContextFreeGrammar.from_string(GRAMMAR)
+    h = ContextFreeGrammar.from_string(RENAMED)
+
+    c = g.canonical_form()
+    assert str(c) == '\n'.join([
+        'S -> A1 A2 | c',
+        'A1 -> & | a A1',
+        'A2 -> A1 d | b',
+    ])
+    assert c.fingerprint() == g.fingerprint()
+    assert h.canonical_form()._canonical == c._canonical
+
+
+def test_lru():
+    cache = AnalysisCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert cache.info() == (2, 1, 2, 2)
+
+
+def test_results_are_translated():
+    g = ContextFreeGrammar.from_string(GRAMMAR)
+    first, follow = g.first, g.follow
+    hits = analyses.hits
+
+    h = ContextFreeGrammar.from_string(RENAMED)
+    X, Y, Z = NonTerminal('X'), NonTerminal('Y'), NonTerminal('Z')
+    S, A, B = NonTerminal('S'), NonTerminal('A'), NonTerminal('B')
+    assert h.first == {X: first[S], Y: first[A], Z: first[B]}
+    assert h.follow == {X: follow[S], Y: follow[A], Z: follow[B]}
+    assert analyses.hits == hits + 2
+
+
+def test_verdicts_are_shared():
+    # Fresh grammars every time, so only the shared cache can answer.
+    assert not ContextFreeGrammar.from_string(GRAMMAR).is_empty()
+    factorable = ContextFreeGrammar.from_string(GRAMMAR).is_factorable(3)
+    misses = analyses.misses
+
+    h = ContextFreeGrammar.from_string(RENAMED)
+    assert not h.is_empty()
+    assert h.is_factorable(3) == factorable
+    assert analyses.misses == misses
+
+
+def test_proper_form_is_keyed_by_names():
+    p = ContextFreeGrammar.from_string(GRAMMAR).to_proper()
+    assert ContextFreeGrammar.from_string(GRAMMAR).to_proper() is not p
+    again = ContextFreeGrammar.from_string(GRAMMAR).to_proper()
+    assert str(again) == str(p)
+    assert analyses.hits == 2
+
+    q = ContextFreeGrammar.from_string(RENAMED).to_proper()
+    assert NonTerminal('X') in q.non_terminals
+    assert Terminal('a') in q.terminals
+    assert analyses.hits == 2
+
+
+def test_disk_cache(tmp_path):
+    path = str(tmp_path / 'analyses.db')
+    cache = DiskCache(path)
+    cache.put(('a', 1), {'x': [1, 2]})
+    cache.close()
+
+    cache = DiskCache(path)
+    assert cache.get(('a', 1)) == {'x': [1, 2]}
+    assert cache.get(('a', 2)) is None
+
+
+def test_disk_cache_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path / 'analyses.db'), max_bytes=1000)
+    for i in range(10):
+        cache.put(i, bytes(300))
+        assert cache.size() <= 1000
+    assert cache.get(0) is None
+    assert cache.get(9) == bytes(300)
+
+
+def test_disk_cache_stale_and_corrupt(tmp_path):
+    path = str(tmp_path / 'analyses.db')
+    cache = DiskCache(path)
+    cache.put('stale', 1)
+    cache.put('corrupt', 2)
+    with cache.db:
+        cache.db.execute("UPDATE analyses SET version = '0' WHERE key = ?",
+                         (repr('stale'),))
+        cache.db.execute("UPDATE analyses SET value = x'00' WHERE key = ?",
+                         (repr('corrupt'),))
+    assert cache.get('stale') is None
+    assert cache.get('corrupt') is None
+    assert cache.size() == 0
+
+    # A damaged cache file is started over.
+    cache.close()
+    with open(path, 'r+b') as f:
+        f.seek(100)
+        f.write(b'not a database' * 100)
+    cache = DiskCache(path)
+    assert cache.get('stale') is None
+    cache.put('stale', 3)
+    assert cache.get('stale') == 3
+
+
+def test_disk_cache_leaves_other_files_alone(tmp_path):
+    text = tmp_path / 'notes.txt'
+    text.write_text('not a database\n')
+    with pytest.warns(UserWarning):
+        assert open_store(str(text)) is None
+    assert text.read_text() == 'not a database\n'
+
+    other = tmp_path / 'other.db'
+    db = sqlite3.connect(str(other))
+    with db:
+        db.execute('CREATE TABLE things (x)')
+    db.close()
+    with pytest.raises(sqlite3.DatabaseError):
+        DiskCache(str(other))
+    db = sqlite3.connect(str(other))
+    assert db.execute('SELECT name FROM sqlite_master').fetchall() == [
+        ('things',)]
+    db.close()
+
+
+def test_disk_cache_unusable_paths(tmp_path):
+    for path in (tmp_path, tmp_path / 'missing' / 'analyses.db'):
+        with pytest.warns(UserWarning):
+            assert open_store(str(path)) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_import_with_unusable_cache(tmp_path):
+    env = dict(os.environ, CHOMCHOM_CACHE=str(tmp_path))
+    subprocess.run(
+        [sys.executable, '-c',
+         'import chomchom.cache\n'
+         'assert chomchom.cache.analyses.store is None\n'],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, check=True)
+
+
+def test_transformations_use_disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(analyses, 'store',
+                        DiskCache(str(tmp_path / 'analyses.db')))
+    g = ContextFreeGrammar.from_string(GRAMMAR)
+    epsilon_free, ne = g.to_epsilon_free()
+    useless = g.remove_useless()
+    factored = ContextFreeGrammar.from_string(GRAMMAR)
+    factored.factor(3)
+
+    # A new process would only have what is on disk.
+    analyses.clear()
+    h = ContextFreeGrammar.from_string(GRAMMAR)
+    assert str(h.to_epsilon_free()[0]) == str(epsilon_free)
+    assert h.to_epsilon_free()[1] == ne
+    assert str(h.remove_useless()) == str(useless)
+    h.factor(3)
+    assert str(h) == str(factored)
+    assert analyses.misses == 0
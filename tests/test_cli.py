@@ -0,0 +1,55 @@
+import json
+
+from chomchom.cli import main
+
+
+def corpus(tmp_path):
+    (tmp_path / 'expr.txt').write_text('''
+        E -> E + T | T
+        T -> T * F | F
+        F -> ( E ) | id
+    ''')
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'ab.txt').write_text('''
+        S -> a S b | &
+    ''')
+    (tmp_path / 'sub' / 'broken.txt').write_text('S -> ->\n')
+    return tmp_path
+
+
+def run(capsys, *args):
+    assert main([str(arg) for arg in args]) == 0
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_analyses(tmp_path, capsys):
+    corpus(tmp_path)
+    results = run(capsys, tmp_path, '-a', 'info,proper,factor,ll1', '-j', 1)
+
+    assert [r['file'] for r in results] == [
+        str(tmp_path / 'expr.txt'),
+        str(tmp_path / 'sub' / 'ab.txt'),
+        str(tmp_path / 'sub' / 'broken.txt'),
+    ]
+    expr, ab, broken = results
+
+    assert expr['info']['language'] == 'infinite'
+    assert expr['info']['first']['E'] == ['(', 'id']
+    assert expr['info']['left_recursions'] == [
+        {'kind': 'direct', 'cycle': ['E']},
+        {'kind': 'direct', 'cycle': ['T']},
+    ]
+    assert not expr['ll1']['ll1']
+
+    assert ab['info']['follow']['S'] == ['$', 'b']
+    assert ab['ll1'] == {'ll1': True, 'conflicts': []}
+    assert ab['factor']['factored']
+    assert 'S1 -> & | a S b | a b' in ab['proper']['grammar'].splitlines()
+
+    assert 'error' in broken
+
+
+def test_workers_and_globs(tmp_path, capsys):
+    corpus(tmp_path)
+    pattern = tmp_path / '**' / '*.txt'
+    assert run(capsys, pattern, '-j', 2) == run(capsys, pattern, '-j', 1)
@@ -0,0 +1,62 @@
+from itertools import product
+
+import pytest
+
+from chomchom import ContextFreeGrammar
+from chomchom.cyk import CYKRecognizer
+
+GRAMMAR = '''
+    S -> A B C | a S b | &
+    A -> a A | &
+    B -> b B c | C
+    C -> c | d C d
+'''
+
+
+def test_to_cnf():
+    g = ContextFreeGrammar.from_string(GRAMMAR)
+    cnf = g.to_cnf()
+    table = cnf.production_rules
+    start = table.id(cnf.start_symbol)
+
+    for lhs, rhs in zip(table.lhs, table.rhs):
+        if not rhs:
+            assert lhs == start
+        elif len(rhs) == 1:
+            assert rhs[0] < 0
+        else:
+            assert len(rhs) == 2
+            assert all(0 <= code != start for code in rhs)
+
+
+def test_to_cnf_shares_suffixes():
+    g = ContextFreeGrammar.from_string('S -> a b c d | b b c d | c d')
+    cnf = g.to_cnf()
+
+    # S, one non-terminal for each terminal, and one for each of `b c d`
+    # and `c d`, which both long productions end with.
+    assert len(cnf.production_rules) == 7
+
+
+def sentences(n):
+    for length in range(n + 1):
+        yield from map(list, product('abcd', repeat=length))
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_same_language_as_earley(use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    g = ContextFreeGrammar.from_string(GRAMMAR)
+    cyk = CYKRecognizer(g, use_numpy=use_numpy)
+    earley = g.build_earley_parser()
+
+    for sentence in sentences(6):
+        assert cyk.recognize(sentence) == earley.recognize(sentence)
+
+
+def test_unknown_terminal():
+    cyk = ContextFreeGrammar.from_string(GRAMMAR).build_cyk_recognizer()
+
+    assert cyk.recognize([])
+    assert not cyk.recognize(['a', 'x', 'b'])
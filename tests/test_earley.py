@@ -0,0 +1,93 @@
+import pytest
+
+from chomchom import ContextFreeGrammar, NonTerminal, ParseError
+from chomchom.earley import trees
+from chomchom.ll1 import Node
+
+
+def test_ambiguous():
+    g = ContextFreeGrammar.from_string('E -> E + E | id')
+    parser = g.build_earley_parser()
+    E = NonTerminal('E')
+    leaf = Node(E, ['id'])
+
+    assert parser.recognize('id + id + id'.split())
+    assert not parser.recognize('id + + id'.split())
+    assert not parser.recognize([])
+
+    forest = parser.parse_forest('id + id + id'.split())
+    assert set(map(repr, trees(forest))) == {
+        repr(Node(E, [Node(E, [leaf, '+', leaf]), '+', leaf])),
+        repr(Node(E, [leaf, '+', Node(E, [leaf, '+', leaf])])),
+    }
+
+
+def test_forest_is_shared():
+    g = ContextFreeGrammar.from_string('E -> E + E | id')
+    parser = g.build_earley_parser()
+    n = 12
+
+    forest = parser.parse_forest(' + '.join(['id'] * n).split())
+
+    # Catalan(n - 1) trees, from a forest with a polynomial number of nodes.
+    assert sum(1 for _ in trees(forest)) == 58786
+
+    seen = set()
+    stack = [forest]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        for family in node.families:
+            stack.extend(child for child in family if hasattr(child, 'families'))
+    assert len(seen) < 10 * n ** 2
+
+
+def test_nullable():
+    g = ContextFreeGrammar.from_string('''
+        S -> A A x | A S
+        A -> B B | &
+        B -> A | b
+    ''')
+    parser = g.build_earley_parser()
+
+    assert parser.recognize(['x'])
+    assert parser.recognize('b x'.split())
+    assert parser.recognize('b b b x'.split())
+    assert not parser.recognize('b b'.split())
+
+
+def test_left_and_right_recursion():
+    g = ContextFreeGrammar.from_string('''
+        S -> S a | L
+        L -> b L | &
+    ''')
+    parser = g.build_earley_parser()
+
+    assert parser.recognize(['b'] * 50 + ['a'] * 50)
+    assert not parser.recognize(['a', 'b'])
+
+    S, L = NonTerminal('S'), NonTerminal('L')
+    assert parser.parse(['b', 'a']) == Node(S, [
+        Node(S, [Node(L, ['b', Node(L, [])])]), 'a',
+    ])
+
+
+def test_cycles():
+    g = ContextFreeGrammar.from_string('''
+        S -> S | A | a
+        A -> S
+    ''')
+    parser = g.build_earley_parser()
+
+    assert parser.recognize(['a'])
+    assert len(list(trees(parser.parse_forest(['a'])))) >= 1
+
+
+def test_parse_error():
+    g = ContextFreeGrammar.from_string('S -> a S b | &')
+    parser = g.build_earley_parser()
+
+    with pytest.raises(ParseError):
+        parser.parse_forest('a a b'.split())
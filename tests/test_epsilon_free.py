@@ -0,0 +1,40 @@
+from chomchom import ContextFreeGrammar, NonTerminal
+
+
+def test_epsilon_free():
+    g = ContextFreeGrammar.from_string('''
+        S -> A B | c
+        A -> a A | &
+        B -> b | A A
+    ''')
+    h, ne = g.to_epsilon_free()
+
+    assert ne == {NonTerminal(x) for x in 'SAB'}
+    assert str(h) == '\n'.join([
+        'S -> A B | c | B | A',
+        'A -> a A | a',
+        'B -> b | A A | A',
+        'S1 -> S | &',
+    ])
+
+
+def test_binarized():
+    n = 30
+    g = ContextFreeGrammar.from_lines(
+        ['S -> ' + ' '.join(f'A{i}' for i in range(n)) + ' | x']
+        + [f'A{i} -> a{i} | &' for i in range(n)]
+    )
+    h, ne = g.to_epsilon_free(binarize=True)
+    table = h.production_rules
+
+    assert len(ne) == n + 1
+    # Instead of 2^n - 1 productions for S.
+    assert len(table.rhs) < 10 * n
+    start = table.id(h.start_symbol)
+    assert all(rhs or lhs == start for lhs, rhs in zip(table.lhs, table.rhs))
+
+    parser = h.build_earley_parser()
+    assert parser.recognize(['x'])
+    assert parser.recognize([])
+    assert parser.recognize(['a3', 'a7', 'a29'])
+    assert not parser.recognize(['a7', 'a3'])
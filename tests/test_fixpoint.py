@@ -0,0 +1,52 @@
+from chomchom import ContextFreeGrammar, NonTerminal, Terminal, Epsilon
+from chomchom.fixpoint import strongly_connected_components, solve_unions
+
+
+def test_components_in_reverse_topological_order():
+    edges = {
+        'a': ['b'],
+        'b': ['c', 'd'],
+        'c': ['b'],
+        'd': [],
+    }
+
+    components = strongly_connected_components('abcd', edges)
+
+    assert [sorted(c) for c in components] == [['d'], ['b', 'c'], ['a']]
+
+
+def test_solve_unions():
+    base = {'a': {1}, 'b': {2}, 'c': {3}, 'd': {4}}
+    deps = {'a': ['b'], 'b': ['c', 'd'], 'c': ['b']}
+
+    value = solve_unions('abcd', base, deps, set())
+
+    assert value == {
+        'a': {1, 2, 3, 4},
+        'b': {2, 3, 4},
+        'c': {2, 3, 4},
+        'd': {4},
+    }
+
+
+def test_solve_unions_bitmasks():
+    base = {'a': 0b001, 'b': 0b010, 'c': 0b100}
+    deps = {'a': ['b'], 'b': ['c'], 'c': ['a']}
+
+    value = solve_unions('abc', base, deps, 0)
+
+    assert value == {'a': 0b111, 'b': 0b111, 'c': 0b111}
+
+
+def test_long_chain():
+    n = 1000
+    g = ContextFreeGrammar.from_string('\n'.join(
+        f'A{i} -> A{i+1} | &' for i in range(n)
+    ) + f'\nA{n} -> a')
+
+    a = Terminal('a')
+    epsilon = Epsilon('&')
+
+    assert g.first[NonTerminal('A0')] == {a, epsilon}
+    assert g.first[NonTerminal(f'A{n}')] == {a}
+    assert NonTerminal(f'A{n}') in g.first_nt[NonTerminal('A0')]
@@ -1,4 +1,9 @@
-from chomchom import ContextFreeGrammar
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from chomchom import ContextFreeGrammar, NonTerminal, Terminal, Epsilon
+from chomchom.factoring import Cancelled
 
 
 def test_is_factored():
@@ -73,3 +78,139 @@ def test_factor():
     assert g.is_factored()
     g.factor(10)
     assert g.is_factored()
+
+
+def test_ll1_conflicts():
+    g = ContextFreeGrammar.from_string('''
+            S -> A a | b
+            A -> a | &
+        ''')
+    assert g.is_factored()
+    assert not g.is_ll1()
+
+    [conflict] = g.ll1_conflicts()
+    assert conflict.nt == NonTerminal('A')
+    assert conflict.lookahead == {Terminal('a')}
+    assert set(conflict.alternatives) == {(Terminal('a'),), (Epsilon('&'),)}
+
+    g = ContextFreeGrammar.from_string('''
+            S -> A b | b
+            A -> a | &
+        ''')
+    assert not g.is_ll1()
+
+    g = ContextFreeGrammar.from_string('''
+            S -> A c | b
+            A -> a | &
+        ''')
+    assert g.is_ll1()
+
+
+def test_ll1_conflicts_many_alternatives():
+    g = ContextFreeGrammar.from_string('S -> ' + ' | '.join(
+        f'k{i} x' for i in range(500)) + ' | k7 y | k42 z')
+
+    conflicts = sorted(g.ll1_conflicts(), key=lambda c: str(c.lookahead))
+    assert [c.lookahead for c in conflicts] == [{Terminal('k42')},
+                                                {Terminal('k7')}]
+    assert len(list(g.find_nondeterminisms())) == 2
+
+
+def test_left_factor():
+    g = ContextFreeGrammar.from_string('''
+            S -> if E then S | if E then S else S | a | a b | a b c
+            E -> e
+        ''')
+    g.left_factor()
+
+    assert g.is_factored()
+    assert str(g) == '\n'.join([
+        'S -> if E then S S1 | a S2',
+        'E -> e',
+        'S1 -> & | else S',
+        'S2 -> & | b S3',
+        'S3 -> & | c',
+    ])
+
+
+def test_left_factor_many_alternatives():
+    n = 50
+    g = ContextFreeGrammar.from_lines(
+        [' | '.join(['S -> x'] + [f'k {i} x' for i in range(n)])])
+    g.left_factor()
+
+    assert g.is_factored()
+    assert len(g.production_rules) == 2
+
+
+def test_remove_indirect_non_determinism():
+    g = ContextFreeGrammar.from_string('''
+            S -> A b | a c
+            A -> a | d
+        ''')
+    S = NonTerminal('S')
+    a, b, c, A = Terminal('a'), Terminal('b'), Terminal('c'), NonTerminal('A')
+
+    g.remove_indirect_non_determinism(S, [A, b], [a, c])
+    assert str(g).splitlines()[0] == 'S -> a b | d b | a c'
+
+
+def test_is_factorable():
+    g = ContextFreeGrammar.from_string('''
+            S -> A B | B C
+            A -> a A | &
+            B -> b B | d
+            C -> c C | c
+        ''')
+    text = str(g)
+
+    assert [g.is_factorable(n) for n in range(4)] == [False, False, True, True]
+    # Nothing is changed, and the steps are only taken once.
+    assert str(g) == text
+    assert len(g._factoring.states) == 3
+
+
+def test_is_factorable_never():
+    # Expanding S keeps bringing the same conflict back, with a longer
+    # right-hand side every time.
+    g = ContextFreeGrammar.from_string('''
+            S -> S a | b
+        ''')
+
+    assert not g.is_factorable(50)
+    assert g._factoring.gave_up
+
+
+def test_factoring_can_be_cancelled():
+    g = ContextFreeGrammar.from_string('''
+            S -> A B | B C
+            A -> a A | &
+            B -> b B | d
+            C -> c C | c
+        ''')
+    calls = []
+
+    def should_stop():
+        calls.append(None)
+        return len(calls) > 1
+
+    with pytest.raises(Cancelled):
+        g.is_factorable(3, should_stop)
+    # The step taken before stopping is kept, and nothing was cached.
+    assert len(g._factoring.states) == 2
+    assert g.is_factorable(3)
+    assert len(g._factoring.states) == 3
+
+
+def test_one_factoring_search_per_grammar():
+    g = ContextFreeGrammar.from_string('''
+            S -> A B | B C
+            A -> a A | &
+            B -> b B | d
+            C -> c C | c
+        ''')
+
+    with ThreadPoolExecutor(8) as executor:
+        searches = list(executor.map(lambda _: g._factoring, range(8)))
+
+    assert all(search is searches[0] for search in searches)
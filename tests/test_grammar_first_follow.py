@@ -169,3 +169,18 @@ def test_first_nt_02():
     }
 
     assert g.first_nt == expected_first_nt
+
+
+def test_suffix_first_index():
+    g = ContextFreeGrammar.from_string('''S -> A C | C e B | B a
+                                          A -> a A | B C
+                                          C -> c C | &
+                                          B -> b B | A B | &''')
+
+    table = g.production_rules
+    for p, rhs in enumerate(table.rhs):
+        row = g._suffix_first[p]
+        assert len(row) == len(rhs) + 1
+        for i in range(len(rhs) + 1):
+            expected = g.first_of_string(table.decode(rhs[i:]))
+            assert g.symbols.terminal_set(row[i]) == expected
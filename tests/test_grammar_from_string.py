@@ -85,3 +85,57 @@ def test_invalid_syntax():
             'T1 -> | &\n'
             'F -> ( E ) | id'
         )
+
+
+def test_comments_and_continuation_lines():
+    g = ContextFreeGrammar.from_lines(iter([
+        '# expressions\n',
+        'E -> T E1\n',
+        'E1 -> + T E1   # sum\n',
+        '    | - T E1\n',
+        '    | &\n',
+        '\n',
+        'T -> id\n',
+    ]))
+
+    assert str(g) == (
+        'E -> T E1\n'
+        'E1 -> + T E1 | - T E1 | &\n'
+        'T -> id'
+    )
+
+
+def test_error_position():
+    with raises(ParseError) as e:
+        ContextFreeGrammar.from_string(
+            'E -> T E1\n'
+            'E1 -> + T E1 | | &\n'
+        )
+    assert (e.value.line, e.value.column) == (2, 16)
+
+    with raises(ParseError) as e:
+        ContextFreeGrammar.from_string(
+            'E -> T E1\n'
+            'E1 -> + Tx E1\n'
+        )
+    assert (e.value.line, e.value.column) == (2, 9)
+
+    with raises(ParseError) as e:
+        ContextFreeGrammar.from_string('| a\nS -> a')
+    assert (e.value.line, e.value.column) == (1, 1)
+
+    with raises(ParseError, match='not a valid NonTerminal') as e:
+        ContextFreeGrammar.from_string('S -> a\n   b -> c')
+    assert (e.value.line, e.value.column) == (2, 4)
+
+
+def test_from_file(tmp_path):
+    path = tmp_path / 'grammar.txt'
+    path.write_text(
+        'S -> a S\n'
+        '   | b   # base case\n'
+    )
+
+    g = ContextFreeGrammar.from_file(path)
+
+    assert str(g) == 'S -> a S | b'
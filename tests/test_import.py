@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+# Importing the core takes around 40 ms. The budget leaves room for slow
+# machines, but not for anything the size of PyQt5 or NumPy.
+BUDGET_US = 150_000
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(code):
+    # Cumulative import time of each top level module, in microseconds.
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, stderr=subprocess.PIPE, universal_newlines=True, check=True,
+    ).stderr
+
+    times = {}
+    for line in output.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and not fields[2].startswith('  '):
+            try:
+                times[fields[2].strip()] = int(fields[1])
+            except ValueError:
+                pass
+    return times
+
+
+def test_core_does_not_load_gui():
+    times = import_times(
+        'import sys, chomchom\n'
+        'chomchom.ContextFreeGrammar.from_string("S -> a S | b").first\n'
+        'assert "PyQt5" not in sys.modules\n'
+        'assert "chomchom.control" not in sys.modules\n'
+    )
+    assert times['chomchom'] < BUDGET_US
+
+
+def test_control_is_still_exported():
+    import chomchom
+    assert 'Control' in dir(chomchom)
+    assert 'Control' in chomchom.__all__
@@ -0,0 +1,50 @@
+from chomchom import ContextFreeGrammar, NonTerminal, Terminal, Epsilon
+
+
+def analyses(g):
+    return g.nullable, g.first, g.follow, g.first_nt
+
+
+def test_add_production_matches_fresh_grammar():
+    g = ContextFreeGrammar.from_string('''
+        S -> A B | c S
+        A -> a A | B
+        B -> b | C d
+        C -> c | S
+    ''')
+    analyses(g)
+
+    g.add_production(NonTerminal('B'), [Epsilon('&')])
+    g.add_production(NonTerminal('D'), [Terminal('e')])
+    g.add_production(NonTerminal('C'), [NonTerminal('D'), NonTerminal('A')])
+
+    assert analyses(g) == analyses(ContextFreeGrammar.from_string(str(g)))
+
+
+def test_remove_production_matches_fresh_grammar():
+    g = ContextFreeGrammar.from_string('''
+        S -> A B | c S
+        A -> a A | B
+        B -> b | C d
+        C -> c | S
+    ''')
+    g.add_production(NonTerminal('A'), [Epsilon('&')])
+    analyses(g)
+
+    g.remove_production(NonTerminal('A'), [Epsilon('&')])
+    g.remove_production(NonTerminal('C'), [NonTerminal('S')])
+
+    assert analyses(g) == analyses(ContextFreeGrammar.from_string(str(g)))
+
+
+def test_factoring_keeps_analyses_up_to_date():
+    g = ContextFreeGrammar.from_string('''
+        S -> a S b | a B | C
+        B -> b B | b
+        C -> c | &
+    ''')
+    analyses(g)
+
+    g.factor(3)
+
+    assert analyses(g) == analyses(ContextFreeGrammar.from_string(str(g)))
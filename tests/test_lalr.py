@@ -0,0 +1,134 @@
+import pytest
+
+from chomchom import ContextFreeGrammar, NonTerminal, Terminal
+from chomchom import ParseError
+from chomchom.ll1 import Node
+
+
+def test_lalr_but_not_slr():
+    g = ContextFreeGrammar.from_string('''
+        S -> L = R | R
+        L -> * R | id
+        R -> L
+    ''')
+    table = g.build_lalr_table()
+
+    assert table.conflicts == []
+    assert table.recognize('id = * id'.split())
+    assert table.recognize('* * id'.split())
+    assert not table.recognize('id = id = id'.split())
+    assert not table.recognize([])
+
+
+def test_left_recursion():
+    g = ContextFreeGrammar.from_string('''
+        E -> E + T | T
+        T -> T * F | F
+        F -> ( E ) | id
+    ''')
+    table = g.build_lalr_table()
+    E, T, F = map(NonTerminal, 'ETF')
+
+    assert table.conflicts == []
+    assert table.parse(['id', '+', 'id', '*', 'id']) == Node(E, [
+        Node(E, [Node(T, [Node(F, ['id'])])]),
+        '+',
+        Node(T, [Node(T, [Node(F, ['id'])]), '*', Node(F, ['id'])]),
+    ])
+
+    with pytest.raises(ParseError, match='token 3'):
+        table.parse(['id', '+', ')'])
+
+
+def test_nullable():
+    g = ContextFreeGrammar.from_string('''
+        S -> A B c
+        A -> a A | &
+        B -> b | &
+    ''')
+    table = g.build_lalr_table()
+    S, A, B = map(NonTerminal, 'SAB')
+
+    assert table.conflicts == []
+    assert table.parse(['c']) == Node(S, [Node(A, []), Node(B, []), 'c'])
+    assert table.recognize('a a b c'.split())
+    assert not table.recognize('a b b c'.split())
+
+
+def test_shift_reduce_conflict():
+    g = ContextFreeGrammar.from_string('E -> E + E | id')
+    table = g.build_lalr_table()
+
+    [conflict] = table.conflicts
+    assert conflict.kind == 'shift/reduce'
+    assert conflict.lookahead == Terminal('+')
+    assert conflict.productions == (
+        (NonTerminal('E'), (NonTerminal('E'), Terminal('+'), NonTerminal('E'))),
+    )
+    # Shifting wins, so + is right associative.
+    assert table.recognize('id + id + id'.split())
+
+
+def test_reduce_reduce_conflict():
+    # LR(1), but merging the states after `a e` and `b e` makes it not
+    # LALR(1).
+    g = ContextFreeGrammar.from_string('''
+        S -> a E c | a F d | b F c | b E d
+        E -> e
+        F -> e
+    ''')
+    table = g.build_lalr_table()
+
+    kinds = {(c.kind, c.lookahead) for c in table.conflicts}
+    assert kinds == {('reduce/reduce', Terminal('c')),
+                     ('reduce/reduce', Terminal('d'))}
+    for conflict in table.conflicts:
+        assert set(conflict.productions) == {
+            (NonTerminal('E'), (Terminal('e'),)),
+            (NonTerminal('F'), (Terminal('e'),)),
+        }
+
+
+def test_epsilon_start():
+    g = ContextFreeGrammar.from_string('S -> a S | &')
+    table = g.build_lalr_table()
+
+    assert table.conflicts == []
+    assert table.recognize([])
+    assert table.recognize(['a', 'a'])
+    assert table.parse([]) == Node(NonTerminal('S'), [])
+
+
+def test_epsilon_reductions_are_not_defaults():
+    # With C -> & as the default of the states that predict it, these used
+    # to loop on their own reductions, pushing states forever.
+    g = ContextFreeGrammar.from_string('''
+        S -> C S x | b
+        C -> &
+    ''')
+    table = g.build_lalr_table()
+    assert not table.recognize(['x'])
+    with pytest.raises(ParseError):
+        table.parse(['x'])
+
+    g = ContextFreeGrammar.from_string('''
+        S -> C C S
+        C -> &
+    ''')
+    table = g.build_lalr_table()
+    assert table.conflicts == []
+    assert not table.recognize([])
+    assert not table.recognize(['x'])
+
+
+def test_reducing_forever_is_refused():
+    table = ContextFreeGrammar.from_string('''
+        S -> S A a | &
+        A -> S | &
+    ''').build_lalr_table()
+
+    assert table.conflicts
+    with pytest.raises(ParseError, match='Reducing forever'):
+        table.recognize(['a'])
+    with pytest.raises(ParseError, match='Reducing forever'):
+        table.parse(['a'])
@@ -0,0 +1,79 @@
+from chomchom import ContextFreeGrammar
+
+
+def size(string):
+    return tuple(ContextFreeGrammar.from_string(string).language_size_class())
+
+
+def test_empty():
+    assert size('S -> a S | S b') == ('empty', 0, 0)
+
+
+def test_infinite():
+    assert size('S -> a S | b') == ('infinite', None, None)
+    # Self-embedding only through a nullable symbol and a unit production.
+    assert size('''
+        S -> A B
+        A -> S | &
+        B -> b | &
+    ''') == ('infinite', None, None)
+
+
+def test_cycles_without_terminals_are_finite():
+    assert size('''
+        S -> A | a
+        A -> S B | b
+        B -> &
+        C -> c C
+    ''') == ('finite', 2, 2)
+
+
+def test_finite():
+    assert size('''
+        S -> A A | &
+        A -> a | b | c
+    ''') == ('finite', 10, 10)
+
+
+def test_long_chain():
+    # 2^n sentences, counted without listing any of them.
+    n = 2000
+    lines = [f'A{i} -> a A{i + 1} | b A{i + 1}' for i in range(n)]
+    lines.append(f'A{n} -> &')
+    g = ContextFreeGrammar.from_lines(lines)
+
+    assert not g.is_infinite()
+    assert g.language_size_class().sentences == 2 ** n
+
+
+def test_ambiguous():
+    # Two derivations of ab.
+    assert size('''
+        S -> a A | B b
+        A -> b
+        B -> a
+    ''') == ('finite', 1, 2)
+    assert size('''
+        S -> a c | a A
+        A -> F F | c
+    ''') == ('finite', 1, 2)
+    assert size('''
+        S -> A A
+        A -> a | a a | &
+    ''')[:2] == ('finite', 5)
+
+
+def test_too_many_to_list():
+    # 2^20 sentences, each with two derivations.
+    lines = [f'A{i} -> a A{i + 1} | b A{i + 1}' for i in range(20)]
+    lines += ['A20 -> c d | C d', 'C -> c']
+    g = ContextFreeGrammar.from_lines(lines)
+    assert tuple(g.language_size_class()) == ('finite', None, 2 ** 21)
+
+
+def test_optional_symbols():
+    # LL(1) as written, but not once its &-productions are removed.
+    lines = ['S -> ' + ' '.join(f'A{i}' for i in range(40))]
+    lines += [f'A{i} -> a{i} | &' for i in range(40)]
+    g = ContextFreeGrammar.from_lines(lines)
+    assert tuple(g.language_size_class()) == ('finite', 2 ** 40, 2 ** 40)
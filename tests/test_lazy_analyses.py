@@ -0,0 +1,113 @@
+import pytest
+
+from chomchom import ContextFreeGrammar, NonTerminal, Terminal, Epsilon, EoS
+
+
+def test_nothing_computed_eagerly():
+    g = ContextFreeGrammar.from_string('''
+        S -> A B | c
+        A -> a A | &
+        B -> b | C
+        D -> d
+    ''')
+
+    assert g._cache == {}
+
+    g.to_epsilon_free()
+    assert set(g._cache) == {
+        '_occurrences', '_nullable_ids', '_canonical_numbering', 'fingerprint',
+        '_layout'}
+
+
+def test_results_are_memoized():
+    g = ContextFreeGrammar.from_string('''
+        S -> A B | c
+        A -> a A | &
+        B -> b | C
+        D -> d
+    ''')
+
+    assert g.first is g.first
+    assert g.nullable == {NonTerminal('A')}
+    assert g.fertile == {NonTerminal(x) for x in 'SABD'}
+    assert g.reachable == {
+        NonTerminal('S'), NonTerminal('A'), NonTerminal('B'),
+        NonTerminal('C'), Terminal('a'), Terminal('b'), Terminal('c'),
+        Epsilon('&'),
+    }
+    assert g.terminals == {Terminal(x) for x in 'abcd'}
+
+
+def test_occurrence_index_is_shared():
+    g = ContextFreeGrammar.from_string('''
+        S -> A B | c
+        A -> a A | &
+        B -> b | C
+        D -> d
+    ''')
+    occurrences = g._occurrences
+
+    g.nullable
+    g.fertile
+    assert g._occurrences is occurrences
+
+
+def test_long_chain():
+    # A0 -> a A1, A1 -> a A2, ..., with the only way out at the end, listed
+    # first so that each round of a naive fixpoint only learns one symbol.
+    n = 3000
+    lines = ['S -> A0', f'A{n} -> b | &']
+    lines += [f'A{i} -> a A{i + 1} | A{i + 1} A{i + 1}' for i in range(n)]
+    g = ContextFreeGrammar.from_lines(lines)
+
+    assert len(g.fertile) == n + 2
+    assert len(g.nullable) == n + 2
+    assert not g.is_empty()
+
+
+def test_invalidated_on_change():
+    g = ContextFreeGrammar.from_string('''
+        S -> a S | a B
+        B -> b
+    ''')
+    S1 = NonTerminal('S1')
+
+    assert S1 not in g.first
+    g.factor(1)
+    assert g.first[S1] == {Terminal('a'), Terminal('b')}
+
+
+def test_copy_keeps_cache_but_not_changes():
+    g = ContextFreeGrammar.from_string('''
+        S -> a S | a B
+        B -> b
+    ''')
+    follow = g.follow
+
+    h = g.copy()
+    assert h.follow is follow
+
+    h.factor(1)
+    assert g.follow is follow
+    assert h.follow is not follow
+
+
+def test_shared_results_cannot_be_changed():
+    g = ContextFreeGrammar.from_string('''
+        S -> a S | A
+        A -> b | &
+    ''')
+    S = NonTerminal('S')
+    h = g.copy()
+
+    with pytest.raises(AttributeError):
+        h.follow[S].clear()
+    with pytest.raises(TypeError):
+        h.first[S] = set()
+    with pytest.raises(AttributeError):
+        h.first_nt[S].add(S)
+    for result in h.terminals, h.nullable, h.fertile, h.reachable:
+        with pytest.raises(AttributeError):
+            result.clear()
+
+    assert g.follow[S] == {EoS('$')}
@@ -0,0 +1,75 @@
+from chomchom import ContextFreeGrammar, NonTerminal
+from chomchom.grammar import LeftRecursion
+
+
+def test_direct():
+    g = ContextFreeGrammar.from_string('''
+        E -> E + T | T
+        T -> T * F | F
+        F -> ( E ) | id
+    ''')
+    E, T = NonTerminal('E'), NonTerminal('T')
+
+    assert g.left_recursions() == [
+        LeftRecursion('direct', (E,)),
+        LeftRecursion('direct', (T,)),
+    ]
+
+    h = g.remove_left_recursion()
+    assert not h.has_left_recursion()
+    assert str(h) == '\n'.join([
+        'E -> T E1',
+        'E1 -> + T E1 | &',
+        'T -> F T1',
+        'T1 -> * F T1 | &',
+        'F -> ( E ) | id',
+    ])
+
+
+def test_indirect():
+    g = ContextFreeGrammar.from_string('''
+        S -> A a | b
+        A -> S c | A d | e
+    ''')
+    S, A = NonTerminal('S'), NonTerminal('A')
+
+    assert g.left_recursions() == [
+        LeftRecursion('direct', (A,)),
+        LeftRecursion('indirect', (S, A)),
+    ]
+
+    h = g.remove_left_recursion()
+    assert not h.has_left_recursion()
+    assert str(h) == '\n'.join([
+        'S -> A a | b',
+        'A -> b c A1 | e A1',
+        'A1 -> a c A1 | d A1 | &',
+    ])
+
+
+def test_hidden():
+    # S -> A S b is left recursive, since A is nullable.
+    g = ContextFreeGrammar.from_string('''
+        S -> A S b | c
+        A -> a | &
+    ''')
+
+    assert g.left_recursions() == [
+        LeftRecursion('direct', (NonTerminal('S'),)),
+    ]
+
+    h = g.remove_left_recursion()
+    assert not h.has_left_recursion()
+
+    parser = h.build_earley_parser()
+    assert parser.recognize('c b b'.split())
+    assert parser.recognize('a c b'.split())
+    assert not parser.recognize('a c'.split())
+
+
+def test_none():
+    g = ContextFreeGrammar.from_string('S -> a S | b')
+
+    assert not g.has_left_recursion()
+    assert g.left_recursions() == []
+    assert str(g.remove_left_recursion()) == str(g)
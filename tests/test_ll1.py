@@ -0,0 +1,99 @@
+import pytest
+
+from chomchom import ContextFreeGrammar, NonTerminal, Terminal, Epsilon, EoS
+from chomchom import ParseError
+from chomchom.ll1 import Node
+
+
+def expressions():
+    return ContextFreeGrammar.from_string('''
+        E  -> T E1
+        E1 -> + T E1 | &
+        T  -> F T1
+        T1 -> * F T1 | &
+        F  -> ( E ) | id
+    ''')
+
+
+def test_table():
+    table = expressions().build_ll1_table()
+
+    assert table.conflicts == []
+    assert table[NonTerminal('E1'), Terminal('+')] == (
+        Terminal('+'), NonTerminal('T'), NonTerminal('E1'))
+    assert table[NonTerminal('E1'), EoS('$')] == (Epsilon('&'),)
+    assert table[NonTerminal('T1'), Terminal(')')] == (Epsilon('&'),)
+    with pytest.raises(KeyError):
+        table[NonTerminal('F'), Terminal('+')]
+
+
+def test_conflicts_are_reported():
+    g = ContextFreeGrammar.from_string('''
+        S -> a S | a B | d
+        B -> b
+    ''')
+    table = g.build_ll1_table()
+
+    [conflict] = table.conflicts
+    assert conflict.nt == NonTerminal('S')
+    assert conflict.lookahead == {Terminal('a')}
+    # The first alternative wins.
+    assert table[NonTerminal('S'), Terminal('a')] == (
+        Terminal('a'), NonTerminal('S'))
+
+
+def test_recognize():
+    table = expressions().build_ll1_table()
+
+    assert table.recognize('id + id * ( id + id )'.split())
+    assert table.recognize([Terminal('id')])
+    assert not table.recognize('id + * id'.split())
+    assert not table.recognize('id id'.split())
+    assert not table.recognize('( id'.split())
+    assert not table.recognize('id - id'.split())
+    assert not table.recognize([])
+
+
+def test_parse():
+    table = expressions().build_ll1_table()
+    E, E1, T, T1, F = map(NonTerminal, ['E', 'E1', 'T', 'T1', 'F'])
+
+    tree = table.parse(['id', '+', 'id'])
+
+    assert tree == Node(E, [
+        Node(T, [Node(F, ['id']), Node(T1, [])]),
+        Node(E1, ['+', Node(T, [Node(F, ['id']), Node(T1, [])]), Node(E1, [])]),
+    ])
+
+
+def test_parse_error():
+    table = expressions().build_ll1_table()
+
+    with pytest.raises(ParseError, match='token 3'):
+        table.parse(['id', '+', ')'])
+
+    with pytest.raises(ParseError, match='expected `\\)`'):
+        table.parse(['(', 'id'])
+
+
+def test_left_recursion_is_refused():
+    table = ContextFreeGrammar.from_string('''
+        S -> S a | b
+    ''').build_ll1_table()
+
+    with pytest.raises(ParseError, match='left recursive'):
+        table.recognize(['b', 'a'])
+    with pytest.raises(ParseError, match='left recursive'):
+        table.parse(['b', 'a'])
+
+
+def test_conflicted_tables_still_parse():
+    table = ContextFreeGrammar.from_string('''
+        S -> a S | a B | d
+        B -> b
+    ''').build_ll1_table()
+
+    assert table.recognize('a a d'.split())
+    assert not table.recognize('a b'.split())
+    with pytest.raises(ParseError, match='token 2'):
+        table.parse('a b'.split())
@@ -0,0 +1,61 @@
+from chomchom import ContextFreeGrammar, NonTerminal, Terminal, Epsilon
+from chomchom.productions import ProductionTable
+
+
+def test_mapping_interface():
+    g = ContextFreeGrammar.from_string('''
+        S -> a S | B
+        B -> b | &
+    ''')
+    S, B = NonTerminal('S'), NonTerminal('B')
+    a, b = Terminal('a'), Terminal('b')
+
+    assert list(g.production_rules) == [S, B]
+    assert g.production_rules[S] == ((a, S), (B,))
+    assert g.production_rules[B] == ((b,), (Epsilon('&'),))
+    assert a not in g.production_rules
+    assert NonTerminal('C') not in g.production_rules
+
+
+def test_contiguous_ranges():
+    table = ProductionTable.build([
+        (NonTerminal('S'), [Terminal('a')]),
+        (NonTerminal('A'), [Terminal('b')]),
+        (NonTerminal('S'), [NonTerminal('A')]),
+    ])
+
+    S = table.id(NonTerminal('S'))
+    A = table.id(NonTerminal('A'))
+
+    assert table.ranges == {S: (0, 2), A: (2, 3)}
+    assert table.lhs == (S, S, A)
+
+
+def test_replace_shares_untouched_productions():
+    g = ContextFreeGrammar.from_string('''
+        S -> a S | a B
+        B -> b B | b
+    ''')
+    table = g.production_rules
+    S = table.id(NonTerminal('S'))
+    B = table.id(NonTerminal('B'))
+
+    new_table = table.replace({S: [table.encoded(S)[0]]})
+
+    assert new_table.encoded(B) == table.encoded(B)
+    assert new_table.encoded(B)[0] is table.encoded(B)[0]
+    assert len(table.encoded(S)) == 2
+
+
+def test_copy_is_independent():
+    g = ContextFreeGrammar.from_string('''
+        S -> a S | a B
+        B -> b B | b
+    ''')
+
+    h = g.copy()
+    h.factor(10)
+
+    assert h.is_factored()
+    assert not g.is_factored()
+    assert str(g) == 'S -> a S | a B\nB -> b B | b'
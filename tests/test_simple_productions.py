@@ -48,3 +48,19 @@ def test_remove_simple_productions():
     )
 
     assert new_productions == expected_productions
+
+
+def test_precedence_ladder():
+    # E0 -> E0 + E1 | E1, E1 -> E1 + E2 | E2, ..., En -> ( E0 ) | id | E0
+    n = 200
+    lines = [f'E{i} -> E{i} + E{i + 1} | E{i + 1}' for i in range(n)]
+    lines.append(f'E{n} -> ( E0 ) | id | E0')
+    g = ContextFreeGrammar.from_lines(lines)
+
+    sets = g.simple_production_sets()
+    assert all(len(others) == n + 1 for others in sets.values())
+
+    new_grammar = g.without_simple_productions()
+    for lhs, rhs in new_grammar.production_rules.items():
+        # Every level's binary production, plus the two atoms, once each.
+        assert len(rhs) == len(set(rhs)) == n + 2
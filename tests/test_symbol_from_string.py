@@ -37,3 +37,32 @@ def test_invalid_symbol():
     ]:
         with raises(ParseError):
             symbol_from_string(s)
+
+
+def test_interned():
+    assert symbol_from_string('A1') is NonTerminal('A1')
+    assert symbol_from_string('id') is Terminal('id')
+    assert symbol_from_string('&') is Epsilon('&')
+    assert Terminal('a') is not Terminal('b')
+
+
+def test_trailing_newline():
+    for kind, string in [(Terminal, 'a'), (NonTerminal, 'S'),
+                         (Epsilon, '&'), (EoS, '$')]:
+        with raises(ParseError):
+            kind(string + '\n')
+        assert kind(string).value == string
+
+
+def test_slotted():
+    assert not hasattr(symbol_from_string('S'), '__dict__')
+
+
+def test_pickle_keeps_identity():
+    import pickle
+    from copy import deepcopy
+
+    symbol = symbol_from_string('S')
+
+    assert pickle.loads(pickle.dumps(symbol)) is symbol
+    assert deepcopy(symbol) is symbol
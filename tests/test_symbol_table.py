@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from chomchom.symbol import SymbolTable, bits
+from chomchom.symbol import NonTerminal, Terminal, Epsilon, EoS
+
+
+def test_dense_ids_per_kind():
+    table = SymbolTable()
+
+    assert table.intern(Epsilon('&')) == SymbolTable.EPSILON_ID
+    assert table.intern(EoS('$')) == SymbolTable.EOS_ID
+
+    assert table.intern(NonTerminal('S')) == 0
+    assert table.intern(Terminal('a')) == 2
+    assert table.intern(NonTerminal('A')) == 1
+    assert table.intern(Terminal('b')) == 3
+    assert table.intern(NonTerminal('S')) == 0
+
+
+def test_encode_decode():
+    table = SymbolTable()
+
+    for symbol in [NonTerminal('S'), Terminal('a'), Epsilon('&'), EoS('$')]:
+        code = table.encode(symbol)
+        assert (code >= 0) == isinstance(symbol, NonTerminal)
+        assert table.decode(code) == symbol
+
+
+def test_masks():
+    table = SymbolTable()
+    a, b, c = Terminal('a'), Terminal('b'), Terminal('c')
+
+    mask = table.terminal_mask([a, c, Epsilon('&')])
+
+    assert table.terminal_set(mask) == {a, c, Epsilon('&')}
+    assert table.terminal_set(mask & ~table.terminal_mask([c])) == {
+        a, Epsilon('&')}
+    assert b not in table.terminal_set(mask)
+
+
+def test_bits():
+    assert list(bits(0)) == []
+    assert list(bits(0b1011)) == [0, 1, 3]
+    assert list(bits(1 << 5000)) == [5000]
+
+
+def test_intern_from_threads():
+    table = SymbolTable()
+    symbols = [NonTerminal(f'N{i}') for i in range(2000)]
+
+    with ThreadPoolExecutor(8) as executor:
+        ids = list(executor.map(
+            lambda _: [table.intern(s) for s in symbols], range(8)))
+
+    assert all(row == ids[0] for row in ids)
+    assert sorted(ids[0]) == list(range(len(symbols)))
+    assert [table.non_terminals[id] for id in ids[0]] == symbols